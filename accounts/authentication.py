@@ -0,0 +1,45 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.cache import get_cached_user, set_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the user, with its donor profile joined
+    in, in the cache for a short while, so authenticated requests usually
+    make no auth query and user.donor_profile costs nothing. The entry
+    leaves out the password hash and carries the token version instead; a
+    token that does not match it (issued after a password change, or
+    presented against an entry cached before one) reloads the user, so a
+    password change takes effect without waiting for the entry to go. User
+    and donor profile saves drop the entry too.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user, token_version = get_cached_user(user_id)
+        if user is None or (api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != token_version):
+            try:
+                user = self.user_model.objects.select_related('donor_profile').get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            token_version = get_md5_hash_password(user.password)
+            set_cached_user(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != token_version:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
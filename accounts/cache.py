@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Short on purpose: with the local-memory cache an edit made on another
+# worker only shows up here once the entry expires.
+AUTH_USER_CACHE_TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+def user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def field_values(instance, exclude=()):
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in exclude
+    }
+
+
+def from_values(model, values):
+    return model.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def get_cached_user(user_id):
+    """
+    The cached user and its token version, or (None, None). The user comes
+    back with donor_profile joined in and without its password, which is
+    never cached (reading user.password loads it from the database).
+    """
+    entry = cache.get(user_key(user_id))
+    if entry is None:
+        return None, None
+    user_model = get_user_model()
+    user = from_values(user_model, entry['user'])
+    profile = entry['donor_profile']
+    if profile is not None:
+        profile = from_values(user_model._meta.get_field('donor_profile').related_model, profile)
+        profile._state.fields_cache['user'] = user
+    user._state.fields_cache['donor_profile'] = profile
+    return user, entry['token_version']
+
+
+def set_cached_user(user):
+    """
+    Caches the columns of the user, minus the password hash, and of its
+    donor profile, along with the token version: simplejwt's hash of the
+    password hash, which tokens are checked against.
+    """
+    try:
+        profile = field_values(user.donor_profile)
+    except user._meta.get_field('donor_profile').related_model.DoesNotExist:
+        profile = None
+    cache.set(user_key(user.pk), {
+        'user': field_values(user, exclude={'password'}),
+        'donor_profile': profile,
+        'token_version': get_md5_hash_password(user.password),
+    }, AUTH_USER_CACHE_TIMEOUT)
+
+
+def invalidate_cached_user(*user_ids):
+    """Drops the entries once the current transaction commits (right away outside one)."""
+    keys = [user_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,39 @@
+"""
+Djoser's emails, queued instead of sent: the message is rendered in the
+request (it needs the request for the site and the user for the token)
+and handed to the job queue, so a slow mail server never holds up
+registration or password resets.
+"""
+from djoser import email
+
+from jobs.email import QueuedEmailBackend
+
+
+class QueuedEmailMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection = QueuedEmailBackend()
+
+
+class ActivationEmail(QueuedEmailMixin, email.ActivationEmail):
+    pass
+
+
+class ConfirmationEmail(QueuedEmailMixin, email.ConfirmationEmail):
+    pass
+
+
+class PasswordResetEmail(QueuedEmailMixin, email.PasswordResetEmail):
+    pass
+
+
+class PasswordChangedConfirmationEmail(QueuedEmailMixin, email.PasswordChangedConfirmationEmail):
+    pass
+
+
+class UsernameChangedConfirmationEmail(QueuedEmailMixin, email.UsernameChangedConfirmationEmail):
+    pass
+
+
+class UsernameResetEmail(QueuedEmailMixin, email.UsernameResetEmail):
+    pass
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='imported',
+            field=models.BooleanField(default=False),
+        ),
+    ]
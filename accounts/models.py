@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from  accounts.managers import CustomUserManager
+from accounts.cache import invalidate_cached_user
+from api.cache import DONORS, invalidate_responses
+from api.geo import LATITUDE_VALIDATORS, LONGITUDE_VALIDATORS, apply_location
 
 
 
@@ -11,11 +14,32 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     address = models.TextField(blank=True,null=True)
     phone_number = models.CharField(max_length=15,blank=True,null=True)
+    # Structured location, resolved from the address through the bundled
+    # gazetteer when no coordinates are given.
+    district = models.CharField(max_length=50,blank=True,null=True)
+    upazila = models.CharField(max_length=50,blank=True,null=True)
+    latitude = models.FloatField(blank=True,null=True,validators=LATITUDE_VALIDATORS)
+    longitude = models.FloatField(blank=True,null=True,validators=LONGITUDE_VALIDATORS)
+    geohash = models.CharField(max_length=12,blank=True,null=True,db_index=True)
+    # Added by the bulk donor import (donors.importer) rather than by
+    # registering; such accounts start without a password.
+    imported = models.BooleanField(default=False)
 
     USERNAME_FIELD = 'email' 
     REQUIRED_FIELDS = []
     
     objects = CustomUserManager()
     
+    def save(self, *args, **kwargs):
+        apply_location(self, self.address)
+        super().save(*args, **kwargs)
+        invalidate_cached_user(self.pk)
+        # Donor listings show the user's name and location.
+        invalidate_responses(DONORS)
+
+    def delete(self, *args, **kwargs):
+        invalidate_cached_user(self.pk)
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.email
\ No newline at end of file
@@ -1,13 +1,53 @@
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer as BaseUserSerializer
+from djoser.serializers import SendEmailResetSerializer
+from djoser.conf import settings as djoser_settings
+from accounts.models import User
+from api.geo import validate_coordinates
+
+LOCATION_FIELDS = ['district','upazila','latitude','longitude']
+
 
 class UserCreateSerializer(BaseUserCreateSerializer):
     class Meta(BaseUserCreateSerializer.Meta):
-        fields = ['id','email','password','first_name','last_name','address','phone_number']
+        fields = ['id','email','password','first_name','last_name','address','phone_number'] + LOCATION_FIELDS
+
+    def validate(self, attrs):
+        return super().validate(validate_coordinates(attrs))
 
 
 class UserSerializer(BaseUserSerializer):
     class Meta(BaseUserSerializer.Meta):
         ref_name = 'CustomUser'
         ref_name = 'CustomUser'
-        fields = ['id','email','first_name','last_name','address','phone_number','is_staff','is_superuser'] 
\ No newline at end of file
+        fields = ['id','email','first_name','last_name','address','phone_number','is_staff','is_superuser'] + LOCATION_FIELDS
+
+    def update(self, instance, validated_data):
+        # A new address or area without coordinates is geocoded again on save.
+        moved = any(field in validated_data for field in ['address','district','upazila'])
+        if moved and 'latitude' not in validated_data and 'longitude' not in validated_data:
+            validated_data.update(latitude=None, longitude=None)
+        return super().update(instance, validated_data)
+
+    def validate(self, attrs):
+        return super().validate(validate_coordinates(attrs))
+
+
+
+class PasswordResetSerializer(SendEmailResetSerializer):
+    """
+    Djoser's reset serializer skips users without a usable password. Donors
+    added by the bulk import have none until they claim their account: once
+    activated, this is how they set one. Other accounts without a password
+    are still skipped. Also used to resend activation emails, which hit the
+    same check.
+    """
+    def get_user(self, is_active=True):
+        try:
+            user = User._default_manager.get(is_active=is_active, email=self.data.get('email', ''))
+            if user.has_usable_password() or user.imported:
+                return user
+        except User.DoesNotExist:
+            pass
+        if djoser_settings.PASSWORD_RESET_SHOW_EMAIL_NOT_FOUND:
+            self.fail('email_not_found')
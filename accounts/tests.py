@@ -1,3 +1,84 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.cache import user_key
+from accounts.models import User
+from donors.models import DonorProfile
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='me@example.com', password='pass12345')
+        DonorProfile.objects.create(user=self.user, blood_group='O+', age=30)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(self.user)}')
+
+    def test_user_and_profile_come_from_the_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/v1/auth/users/me/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/v1/auth/users/me/').status_code, 200)
+
+    def test_user_and_profile_writes_drop_the_entry(self):
+        self.client.get('/api/v1/auth/users/me/')
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get('/api/v1/auth/users/me/').status_code, 401)
+
+        self.user.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.client.get('/api/v1/dashboard/')
+        profile = DonorProfile.objects.get(user=self.user)
+        profile.blood_group = 'B-'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        response = self.client.get('/api/v1/dashboard/')
+        self.assertEqual(response.data['donor_profile']['blood_group'], 'B-')
+
+    def test_the_entry_leaves_out_the_password_hash(self):
+        self.client.get('/api/v1/auth/users/me/')
+        entry = cache.get(user_key(self.user.pk))
+        self.assertNotIn('password', entry['user'])
+        self.assertNotIn(self.user.password, str(entry))
+        self.assertEqual(entry['donor_profile']['blood_group'], 'O+')
+
+    @mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+    def test_password_change_revokes_cached_tokens_without_a_save(self):
+        client = APIClient()
+        old = f'JWT {AccessToken.for_user(self.user)}'
+        self.assertEqual(client.get('/api/v1/auth/users/me/', HTTP_AUTHORIZATION=old).status_code, 200)
+
+        # update() sends no signal, so nothing drops the entry.
+        User.objects.filter(pk=self.user.pk).update(password=make_password('changed123'))
+        self.user.refresh_from_db()
+        new = f'JWT {AccessToken.for_user(self.user)}'
+        self.assertEqual(client.get('/api/v1/auth/users/me/', HTTP_AUTHORIZATION=new).status_code, 200)
+        self.assertEqual(client.get('/api/v1/auth/users/me/', HTTP_AUTHORIZATION=old).status_code, 401)
+
+    def test_profile_coordinates_are_validated(self):
+        response = self.client.patch('/api/v1/auth/users/me/', {'latitude': -95, 'longitude': 90}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('latitude', response.data)
+        response = self.client.patch('/api/v1/auth/users/me/', {'longitude': 90.4}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('latitude', response.data)
+
+    def test_entries_are_dropped_only_after_the_commit(self):
+        self.client.get('/api/v1/auth/users/me/')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.first_name = 'Renamed'
+            self.user.save()
+        self.assertIsNotNone(cache.get(user_key(self.user.pk)))
 
-# Create your tests here.
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(user_key(self.user.pk)))
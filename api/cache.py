@@ -0,0 +1,147 @@
+"""
+Response cache for the public list endpoints. Every namespace ('requests',
+'donors') has a generation counter that is part of each key; writes bump
+the counter, which orphans every cached page of that namespace at once
+instead of hunting down individual keys. Orphans simply expire.
+
+The cache alias defaults to 'default' (local memory, one copy per process).
+Point CACHE_URL at Redis to share entries and generations across workers.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60)
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+REQUESTS = 'requests'
+DONORS = 'donors'
+
+
+def response_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def generation_key(namespace):
+    return f"responses:{namespace}:generation"
+
+
+def get_generation(namespace):
+    cache = response_cache()
+    key = generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        # Generations never expire; losing one just starts a fresh space.
+        cache.add(key, 1, None)
+        generation = cache.get(key, 1)
+    return generation
+
+
+def invalidate_responses(*namespaces):
+    """
+    Bumps the namespaces' generations once the current transaction commits
+    (right away outside one). Bumping earlier would let a concurrent read
+    cache the old rows under the new generation for the whole TTL.
+    """
+    transaction.on_commit(lambda: bump_generations(namespaces))
+
+
+def bump_generations(namespaces):
+    cache = response_cache()
+    for namespace in namespaces:
+        try:
+            cache.incr(generation_key(namespace))
+        except ValueError:
+            cache.add(generation_key(namespace), 2, None)
+
+
+def normalized_query(request):
+    """
+    The query string with keys sorted, repeated values sorted and empty
+    values dropped, so ?a=1&b=2 and ?b=2&a=1&c= share an entry.
+    """
+    params = request.query_params
+    pairs = [
+        (key, value)
+        for key in sorted(params)
+        for value in sorted(params.getlist(key))
+        if value != ''
+    ]
+    return urlencode(pairs)
+
+
+def response_cache_key(namespace, request, variant):
+    # Paginated responses embed absolute links, so the host is part of it.
+    url = f"{request.build_absolute_uri(request.path)}?{normalized_query(request)}"
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f"responses:{namespace}:{get_generation(namespace)}:{variant}:{digest}"
+
+
+def record(namespace, outcome):
+    cache = response_cache()
+    key = f"responses:{namespace}:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def response_cache_stats():
+    """{namespace: {'hits': n, 'misses': n}} since the counters were created."""
+    cache = response_cache()
+    return {
+        namespace: {
+            'hits': cache.get(f"responses:{namespace}:hits", 0),
+            'misses': cache.get(f"responses:{namespace}:misses", 0),
+        }
+        for namespace in (REQUESTS, DONORS)
+    }
+
+
+class CachedListMixin:
+    """
+    Serves list() from the response cache. Views set `cache_namespace` and
+    override `cache_variant()` when the result depends on who is asking.
+    ETag/Last-Modified set further down the MRO are cached with the data,
+    so conditional GETs on a hit are answered without touching the database.
+    """
+    cache_namespace = None
+
+    def cache_variant(self, request):
+        return 'public'
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache_key(self.cache_namespace, request, self.cache_variant(request))
+        entry = response_cache().get(key)
+        if entry is not None:
+            record(self.cache_namespace, 'hits')
+            validators = {name: value for name, value in entry['validators'].items() if value}
+            response = get_conditional_response(
+                request._request,
+                etag=validators.get('ETag'),
+                last_modified=parse_http_date_safe(validators.get('Last-Modified', '')),
+            )
+            if response is None:
+                response = Response(entry['data'])
+            for name, value in {**validators, 'X-Cache': 'HIT'}.items():
+                response[name] = value
+            return response
+
+        record(self.cache_namespace, 'misses')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            entry = {
+                'data': response.data,
+                'validators': {name: response.get(name) for name in VALIDATOR_HEADERS},
+            }
+            response_cache().set(key, entry, RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,90 @@
+"""
+ETag / Last-Modified support. A conditional GET is answered with 304
+before anything is serialized; list validators cost one aggregate query
+(bounded by the page on keyset pages), and none at all when
+CachedListMixin sits in front and has the page.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from api.cache import get_generation, normalized_query
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """The 304 response for a request whose validators still match, or None."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, last_modified=None):
+    # A 304 repeats the validators the 200 would have carried.
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for list() and retrieve() of models with an updated_at
+    column. The list validator is the newest updated_at and row count of
+    the filtered queryset (of just the page's rows on ?pagination=cursor,
+    so deep scrolling never counts the table), plus the normalized query
+    string (pages and filters share the aggregate but not the content), the
+    cache variant, the namespace's cache generation (covers related rows
+    without updated_at, and deletions) and today's date (eligibility and
+    expiry are computed per day).
+    """
+    def list_validators(self, request, queryset):
+        window = None
+        if hasattr(self.paginator, 'keyset_window'):
+            window = self.paginator.keyset_window(queryset, request)
+        if window is None:
+            window = queryset.order_by()
+        state = window.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        variant = self.cache_variant(request) if hasattr(self, 'cache_variant') else 'public'
+        generation = get_generation(self.cache_namespace) if getattr(self, 'cache_namespace', None) else None
+        etag = make_etag(
+            state['last_modified'], state['count'], normalized_query(request), variant,
+            generation, timezone.now().date(),
+        )
+        return etag, state['last_modified']
+
+    def filter_queryset(self, queryset):
+        # list() filters once and hands the result to the list below it;
+        # search and ?near= filters are not cheap to run twice.
+        filtered = getattr(self, '_filtered_queryset', None)
+        if filtered is not None:
+            return filtered
+        return super().filter_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.list_validators(request, queryset)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            self._filtered_queryset = queryset
+            try:
+                response = super().list(request, *args, **kwargs)
+            finally:
+                self._filtered_queryset = None
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        generation = get_generation(self.cache_namespace) if getattr(self, 'cache_namespace', None) else None
+        etag = make_etag(instance.pk, instance.updated_at, generation, timezone.now().date())
+        response = not_modified(request, etag, instance.updated_at)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, instance.updated_at)
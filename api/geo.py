@@ -0,0 +1,263 @@
+"""
+Offline geocoding against the bundled Bangladesh gazetteer, geohash cell
+indexing and the ?near=lat,lon&radius_km= filter backend.
+"""
+import json
+import math
+import operator
+import re
+from collections import namedtuple
+from functools import lru_cache, reduce
+from pathlib import Path
+
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'bd_gazetteer.json'
+EARTH_RADIUS_KM = 6371.0
+# ~150m cells; queries match on a shorter prefix sized to the radius.
+GEOHASH_PRECISION = 7
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+Location = namedtuple('Location', ['district', 'upazila', 'latitude', 'longitude'])
+
+LATITUDE_VALIDATORS = [MinValueValidator(-90), MaxValueValidator(90)]
+LONGITUDE_VALIDATORS = [MinValueValidator(-180), MaxValueValidator(180)]
+
+
+def _normalize(name):
+    return re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).strip()
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """
+    Loads the gazetteer once per process. Districts are keyed by their
+    normalized name and aliases; upazilas by name, since a few (Kotwali)
+    exist in more than one district.
+    """
+    data = json.loads(GAZETTEER_PATH.read_text(encoding='utf-8'))
+    districts = {}
+    for district in data['districts']:
+        for name in [district['name'], *district['aliases']]:
+            districts[_normalize(name)] = district
+    upazilas = {}
+    for upazila in data['upazilas']:
+        upazilas.setdefault(_normalize(upazila['name']), []).append(upazila)
+    return districts, upazilas
+
+
+def _pick_upazila(candidates, district):
+    if district:
+        for upazila in candidates:
+            if upazila['district'] == district['name']:
+                return upazila
+        return None
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def resolve_location(district=None, upazila=None, text=None):
+    """
+    Resolves a place to coordinates without any network call. Explicit
+    district/upazila names win; otherwise the free text (an address or a
+    hospital name) is scanned for known names, most specific first.
+    Returns a Location or None.
+    """
+    districts, upazilas = gazetteer()
+    found_district = districts.get(_normalize(district)) if district else None
+    found_upazila = None
+    if upazila:
+        found_upazila = _pick_upazila(upazilas.get(_normalize(upazila), []), found_district)
+
+    if not found_district and not found_upazila and text:
+        words = f' {_normalize(text)} '
+        for name, entry in districts.items():
+            if f' {name} ' in words:
+                found_district = entry
+                break
+        for name, candidates in upazilas.items():
+            if f' {name} ' in words:
+                found_upazila = _pick_upazila(candidates, found_district)
+                if found_upazila:
+                    break
+
+    if found_upazila:
+        if not found_district:
+            found_district = districts[_normalize(found_upazila['district'])]
+        return Location(found_district['name'], found_upazila['name'], found_upazila['lat'], found_upazila['lon'])
+    if found_district:
+        return Location(found_district['name'], None, found_district['lat'], found_district['lon'])
+    return None
+
+
+def apply_location(instance, text=None):
+    """
+    Fills in missing coordinates (and district/upazila names) on a model
+    with district, upazila, latitude, longitude and geohash fields, then
+    refreshes its geohash cell.
+    """
+    if instance.latitude is None or instance.longitude is None:
+        place = resolve_location(instance.district, instance.upazila, text)
+        if place:
+            instance.district = instance.district or place.district
+            instance.upazila = instance.upazila or place.upazila
+            instance.latitude, instance.longitude = place.latitude, place.longitude
+
+    if instance.latitude is not None and instance.longitude is not None:
+        instance.geohash = encode_geohash(instance.latitude, instance.longitude)
+    else:
+        instance.geohash = None
+
+
+def validate_coordinates(attrs):
+    """
+    Serializer-level check for models with latitude/longitude fields: both
+    are given or neither is, since one alone would be silently replaced by
+    geocoding on save.
+    """
+    latitude, longitude = attrs.get('latitude'), attrs.get('longitude')
+    if (latitude is None) != (longitude is None):
+        missing = 'longitude' if longitude is None else 'latitude'
+        raise ValidationError({missing: "Give both latitude and longitude, or neither."})
+    return attrs
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def cell_size_degrees(precision):
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes that together cover the circle. The precision is the
+    finest one whose cells are still at least as large as the radius, so
+    the bounding box never spans more than 3x3 cells.
+    """
+    dlat = radius_km / 111.32
+    dlon = radius_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+
+    precision = 1
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        cell_lat, cell_lon = cell_size_degrees(candidate)
+        if cell_lat < dlat or cell_lon < dlon:
+            break
+        precision = candidate
+    cell_lat, cell_lon = cell_size_degrees(precision)
+
+    def steps(center, half, step):
+        count = math.ceil(2 * half / step)
+        return [center - half + min(i * step, 2 * half) for i in range(count + 1)]
+
+    return sorted({
+        encode_geohash(lat, lon, precision)
+        for lat in steps(latitude, dlat, cell_lat)
+        for lon in steps(longitude, dlon, cell_lon)
+    })
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def distance_expression(latitude_field, longitude_field, latitude, longitude):
+    """Haversine distance in km as a database expression."""
+    lat1, lon1 = Radians(F(latitude_field)), Radians(F(longitude_field))
+    lat2, lon2 = Value(math.radians(latitude)), Value(math.radians(longitude))
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2)
+        + Cos(lat1) * Cos(lat2) * Power(Sin((lon2 - lon1) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+class NearFilter(BaseFilterBackend):
+    """
+    ?near=lat,lon&radius_km=R keeps rows within R km and orders them by
+    distance. Rows are first pruned to the geohash cells around the point
+    (an index range scan on the geohash column), and the exact distance is
+    only computed for what is left. Views point `location_field_prefix` at
+    the model holding the location fields (e.g. 'user__').
+    """
+    near_param = 'near'
+    radius_param = 'radius_km'
+    default_radius_km = 10.0
+    max_radius_km = 300.0
+
+    def get_point(self, request):
+        near = request.query_params.get(self.near_param)
+        if not near:
+            return None
+        try:
+            latitude, longitude = (float(part) for part in near.split(','))
+            radius = float(request.query_params.get(self.radius_param, self.default_radius_km))
+        except ValueError:
+            raise ValidationError({self.near_param: "Use near=<lat>,<lon> and a numeric radius_km."})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({self.near_param: "Coordinates are out of range."})
+        if not 0 < radius <= self.max_radius_km:
+            raise ValidationError({self.radius_param: f"radius_km must be between 0 and {self.max_radius_km:g}."})
+        return latitude, longitude, radius
+
+    def filter_queryset(self, request, queryset, view):
+        point = self.get_point(request)
+        if point is None:
+            return queryset
+        latitude, longitude, radius = point
+        prefix = getattr(view, 'location_field_prefix', '')
+
+        cells = reduce(operator.or_, [
+            Q(**{f'{prefix}geohash__startswith': cell})
+            for cell in covering_cells(latitude, longitude, radius)
+        ])
+        distance = distance_expression(f'{prefix}latitude', f'{prefix}longitude', latitude, longitude)
+        queryset = queryset.filter(cells).annotate(distance_km=distance).filter(distance_km__lte=radius)
+
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('distance_km', 'pk')
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.near_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Latitude and longitude, e.g. 23.81,90.41.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.radius_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Search radius in km (default {self.default_radius_km:g}).',
+                'schema': {'type': 'number'},
+            },
+        ]
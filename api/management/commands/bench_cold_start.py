@@ -0,0 +1,66 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: import the WSGI app, then serve one request.
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import importlib
+module, attribute, path, host = sys.argv[1:5]
+app = getattr(importlib.import_module(module), attribute)
+imported = time.perf_counter()
+status = []
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': host,
+    'SERVER_PORT': '443', 'HTTP_HOST': host, 'wsgi.url_scheme': 'https', 'wsgi.input': sys.stdin.buffer,
+    'wsgi.errors': sys.stderr, 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+    'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+body = b''.join(app(environ, lambda code, headers, exc_info=None: status.append(code)))
+done = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_response_ms': (done - start) * 1000, 'status': status[0]}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure time-to-first-response of the WSGI app: every run starts a fresh "
+        "interpreter, imports the app and serves one GET, like a serverless cold start."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/v1/')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--json', action='store_true', help="Print the raw measurements as JSON.")
+
+    def handle(self, *args, **options):
+        module, attribute = settings.WSGI_APPLICATION.rsplit('.', 1)
+        host = next((host for host in settings.ALLOWED_HOSTS if not host.startswith('.')), 'localhost')
+
+        runs = []
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-c', PROBE, module, attribute, options['path'], host],
+                capture_output=True, text=True, env=os.environ.copy(), stdin=subprocess.DEVNULL,
+            )
+            if result.returncode != 0:
+                raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "Probe failed.")
+            runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        if options['json']:
+            self.stdout.write(json.dumps(runs, indent=2))
+            return
+
+        self.stdout.write(f"{options['runs']} cold start(s) of {settings.WSGI_APPLICATION}, GET {options['path']} (status {runs[0]['status']})")
+        for field, label in (('import_ms', 'import'), ('first_response_ms', 'first response')):
+            values = [run[field] for run in runs]
+            self.stdout.write(
+                f"  {label:<15} median {statistics.median(values):7.1f} ms  "
+                f"min {min(values):7.1f} ms  max {max(values):7.1f} ms"
+            )
@@ -0,0 +1,113 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so the settings pick up DB_CONN_MODE: serves
+# `requests` GETs through the WSGI app from `concurrency` threads, counting
+# the connections Django opens along the way.
+PROBE = """
+import importlib, json, statistics, sys, threading, time
+module, attribute, path, host, total, concurrency = sys.argv[1:7]
+total, concurrency = int(total), int(concurrency)
+app = getattr(importlib.import_module(module), attribute)
+from django.db.backends.signals import connection_created
+opened = []
+connection_created.connect(lambda sender, connection, **kwargs: opened.append(1), weak=False)
+
+def get():
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': host,
+        'SERVER_PORT': '443', 'HTTP_HOST': host, 'wsgi.url_scheme': 'https', 'wsgi.input': sys.stdin.buffer,
+        'wsgi.errors': sys.stderr, 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    response = app(environ, lambda code, headers, exc_info=None: status.append(code))
+    b''.join(response)
+    response.close()
+    return status[0]
+
+get()  # warm-up: imports and URL resolver, not connection setup
+opened.clear()
+latencies, failures, lock = [], [], threading.Lock()
+
+def worker(count):
+    for _ in range(count):
+        start = time.perf_counter()
+        status = get()
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not status.startswith('200'):
+                failures.append(status)
+
+threads = [threading.Thread(target=worker, args=(total // concurrency + (i < total % concurrency),)) for i in range(concurrency)]
+start = time.perf_counter()
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+elapsed = time.perf_counter() - start
+latencies.sort()
+print(json.dumps({
+    'requests_per_sec': len(latencies) / elapsed,
+    'p50_ms': statistics.median(latencies),
+    'p95_ms': latencies[int(len(latencies) * 0.95) - 1],
+    'connections_opened': len(opened),
+    'failures': len(failures),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec of every DB_CONN_MODE against the configured database "
+        "(point it at a local Postgres). Each mode runs in a fresh interpreter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', nargs='+', default=['direct', 'persistent', 'pool'], choices=settings.DB_CONN_MODES)
+        parser.add_argument('--path', default='/api/v1/health/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--json', action='store_true', help="Print the raw measurements as JSON.")
+
+    def handle(self, *args, **options):
+        module, attribute = settings.WSGI_APPLICATION.rsplit('.', 1)
+        host = next((host for host in settings.ALLOWED_HOSTS if not host.startswith('.')), 'localhost')
+
+        results = {}
+        for mode in options['modes']:
+            result = subprocess.run(
+                [
+                    sys.executable, '-c', PROBE, module, attribute, options['path'], host,
+                    str(options['requests']), str(options['concurrency']),
+                ],
+                capture_output=True, text=True, env={**os.environ, 'DB_CONN_MODE': mode},
+                stdin=subprocess.DEVNULL,
+            )
+            if result.returncode != 0:
+                message = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "Probe failed."
+                raise CommandError(f"{mode}: {message}")
+            results[mode] = json.loads(result.stdout.strip().splitlines()[-1])
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{options['requests']} x GET {options['path']} from {options['concurrency']} thread(s), "
+            f"{settings.DATABASES['default']['HOST']}"
+        )
+        baseline = results.get('direct')
+        for mode, run in results.items():
+            speedup = f"  x{run['requests_per_sec'] / baseline['requests_per_sec']:.2f}" if baseline else ''
+            self.stdout.write(
+                f"  {mode:<11} {run['requests_per_sec']:8.1f} req/s  p50 {run['p50_ms']:6.1f} ms  "
+                f"p95 {run['p95_ms']:6.1f} ms  connections {run['connections_opened']:4d}  "
+                f"failures {run['failures']}{speedup}"
+            )
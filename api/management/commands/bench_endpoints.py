@@ -0,0 +1,266 @@
+import json
+import math
+import statistics
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.urls import get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from api.cache import DONORS, REQUESTS, invalidate_responses, response_cache
+from api.metrics import RequestMetrics
+from blood_request.models import BloodRequest
+from donors.models import DonationTransaction, DonorProfile
+
+Case = namedtuple('Case', ['name', 'route', 'method', 'path', 'role', 'payload'], defaults=[None])
+
+# Paths are filled in from the fixture created for the run; payloads name a
+# payload_<name>() method. Every call runs in a savepoint that is rolled back.
+CASES = [
+    Case('root', 'api-root', 'get', '/api/v1/', 'anon'),
+    Case('health', 'health', 'get', '/api/v1/health/', 'anon'),
+    Case('donors list', 'donors-list', 'get', '/api/v1/donors/', 'anon'),
+    Case('donors list filtered', 'donors-list', 'get', '/api/v1/donors/?blood_group=O%2B', 'anon'),
+    Case('donors detail', 'donors-detail', 'get', '/api/v1/donors/{profile}/', 'anon'),
+    Case('donors import 10 rows', 'donors-bulk-import', 'post', '/api/v1/donors/import/', 'staff', 'import'),
+    Case('requests list', 'requests-list', 'get', '/api/v1/requests/', 'anon'),
+    Case('requests list signed in', 'requests-list', 'get', '/api/v1/requests/', 'user'),
+    Case('requests near', 'requests-list', 'get', '/api/v1/requests/?near=23.8103,90.4125&radius_km=10', 'anon'),
+    Case('requests detail', 'requests-detail', 'get', '/api/v1/requests/{open_request}/', 'anon'),
+    Case('requests candidates', 'requests-candidates', 'get', '/api/v1/requests/{open_request}/candidates/', 'user'),
+    Case('requests accept', 'requests-accept', 'post', '/api/v1/requests/{open_request}/accept/', 'user'),
+    Case('requests withdraw', 'requests-withdraw', 'post', '/api/v1/requests/{accepted_request}/withdraw/', 'user'),
+    Case('requests batch 10', 'requests-batch', 'post', '/api/v1/requests/batch/', 'user', 'batch'),
+    Case('dashboard', 'dashboard-list', 'get', '/api/v1/dashboard/', 'user'),
+    Case('my requests list', 'my-requests-list', 'get', '/api/v1/my-requests/', 'user'),
+    Case('my requests detail', 'my-requests-detail', 'get', '/api/v1/my-requests/{own_request}/', 'user'),
+    Case('auth root', 'api-root', 'get', '/api/v1/auth/', 'anon'),
+    Case('auth me', 'user-me', 'get', '/api/v1/auth/users/me/', 'user'),
+    Case('auth users', 'user-list', 'get', '/api/v1/auth/users/', 'user'),
+    Case('auth user detail', 'user-detail', 'get', '/api/v1/auth/users/{user}/', 'user'),
+    Case('auth reset password', 'user-reset-password', 'post', '/api/v1/auth/users/reset_password/', 'anon', 'email'),
+    Case('jwt create', 'jwt-create', 'post', '/api/v1/auth/jwt/create/', 'anon', 'credentials'),
+    Case('jwt refresh', 'jwt-refresh', 'post', '/api/v1/auth/jwt/refresh/', 'anon', 'refresh'),
+    Case('jwt verify', 'jwt-verify', 'post', '/api/v1/auth/jwt/verify/', 'anon', 'verify'),
+    Case('payment history', 'payment_history', 'get', '/api/v1/payment/history/', 'user'),
+    Case('payment export', 'payment_export', 'get', '/api/v1/payment/export/', 'staff'),
+    Case('payment success', 'payment_success', 'post', '/api/v1/payment/success/', 'anon', 'tran_id'),
+    Case('payment fail', 'payment_fail', 'post', '/api/v1/payment/fail/', 'anon', 'tran_id'),
+    Case('payment cancel', 'payment_cancel', 'post', '/api/v1/payment/cancel/', 'anon'),
+]
+
+SKIPPED = {
+    'initiate-payment': "calls the payment gateway (see run_gateway_stub)",
+    'initiate-payment-async': "calls the payment gateway (see run_gateway_stub)",
+    'user-activation': "needs an emailed token",
+    'user-resend-activation': "only for inactive users",
+    'user-reset-password-confirm': "needs an emailed token",
+    'user-reset-username': "DJOSER has no USERNAME_RESET_CONFIRM_URL",
+    'user-reset-username-confirm': "needs an emailed token",
+    'user-set-password': "hashes passwords like jwt create",
+    'user-set-username': "changes the caller's login",
+    'run-jobs': "runs queued jobs (cron hook)",
+}
+
+PASSWORD = 'bench-pass-12345'
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every route in api/urls.py through the test client against the "
+        "current database (see seed_data): p50/p95/p99 latency and queries per call, "
+        "written as JSON so runs can be compared. Nothing is left behind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', nargs='+', default=[], help="Benchmark only cases whose name contains one of these.")
+        parser.add_argument('--cold', action='store_true', help="Clear the cache before every call.")
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--baseline', help="A previous --output file to compare against.")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        cases = [case for case in CASES if not options['only'] or any(part in case.name for part in options['only'])]
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)['results']
+
+        meta = {
+            'started_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'cold': options['cold'],
+            'rows': {
+                'users': User.objects.count(),
+                'donor_profiles': DonorProfile.objects.count(),
+                'blood_requests': BloodRequest.objects.count(),
+                'transactions': DonationTransaction.objects.count(),
+            },
+        }
+
+        with transaction.atomic():
+            self.setup_fixture()
+            results = {case.name: self.run_case(case, options) for case in cases}
+            transaction.set_rollback(True)
+        # Cached pages may still show the fixture rows.
+        invalidate_responses(REQUESTS, DONORS)
+
+        covered = {case.route for case in CASES}
+        uncovered = sorted(set(route_names(get_resolver('api.urls').url_patterns)) - covered - set(SKIPPED))
+        report = {'meta': meta, 'results': results, 'skipped': SKIPPED, 'uncovered': uncovered}
+
+        self.print_report(report, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def setup_fixture(self):
+        suffix = uuid.uuid4().hex[:8]
+        today = timezone.now().date()
+        self.user = User.objects.create_user(email=f'bench-{suffix}@bench.example.com', password=PASSWORD, first_name='Bench')
+        self.staff = User.objects.create_user(email=f'bench-staff-{suffix}@bench.example.com', password=PASSWORD, is_staff=True)
+        # O- can give to every request; no last donation keeps it eligible.
+        profile = DonorProfile.objects.create(user=self.user, blood_group='O-', age=30)
+
+        def blood_request(recipient):
+            return BloodRequest.objects.create(
+                recipient=recipient, blood_group='A+', bags_needed=100,
+                hospital_name='Dhaka Medical College Hospital', donation_date=today + timedelta(days=7),
+            )
+        open_request = blood_request(self.staff)
+        accepted_request = blood_request(self.staff)
+        accepted_request.donors.add(self.user)
+        own_request = blood_request(self.user)
+        self.donation = DonationTransaction.objects.create(user=self.user, amount=500)
+
+        self.ids = {
+            'profile': profile.pk, 'user': self.user.pk, 'open_request': open_request.pk,
+            'accepted_request': accepted_request.pk, 'own_request': own_request.pk,
+        }
+        self.refresh = RefreshToken.for_user(self.user)
+
+        host = next((host for host in settings.ALLOWED_HOSTS if not host.startswith('.')), 'localhost')
+        self.clients = {}
+        for role, user in (('anon', None), ('user', self.user), ('staff', self.staff)):
+            client = APIClient(SERVER_NAME=host)
+            if user:
+                client.credentials(HTTP_AUTHORIZATION=f'JWT {RefreshToken.for_user(user).access_token}')
+            self.clients[role] = client
+
+    def payload_import(self):
+        rows = ''.join(f'bench{index}-{uuid.uuid4().hex[:6]}@bench.example.com,B+,30\n' for index in range(10))
+        return {'file': SimpleUploadedFile('donors.csv', f'email,blood_group,age\n{rows}'.encode())}, 'multipart'
+
+    def payload_batch(self):
+        item = {'blood_group': 'B+', 'bags_needed': 2, 'hospital_name': 'Chittagong Medical College Hospital'}
+        return [item] * 10, 'json'
+
+    def payload_credentials(self):
+        return {'email': self.user.email, 'password': PASSWORD}, 'json'
+
+    def payload_email(self):
+        return {'email': self.user.email}, 'json'
+
+    def payload_refresh(self):
+        return {'refresh': str(self.refresh)}, 'json'
+
+    def payload_verify(self):
+        return {'token': str(self.refresh.access_token)}, 'json'
+
+    def payload_tran_id(self):
+        return {'tran_id': f'don_{self.donation.pk}'}, 'multipart'
+
+    def call(self, case):
+        client = self.clients[case.role]
+        path = case.path.format(**self.ids)
+        if case.payload:
+            data, format = getattr(self, f'payload_{case.payload}')()
+            response = getattr(client, case.method)(path, data, format=format)
+        else:
+            response = getattr(client, case.method)(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def run_case(self, case, options):
+        latencies, queries, db_times, statuses = [], [], [], set()
+        for iteration in range(options['warmup'] + options['iterations']):
+            if options['cold']:
+                response_cache().clear()
+            metrics = RequestMetrics()
+            with transaction.atomic():
+                with connection.execute_wrapper(metrics):
+                    start = perf_counter()
+                    response = self.call(case)
+                    elapsed = perf_counter() - start
+                transaction.set_rollback(True)
+            if iteration < options['warmup']:
+                continue
+            latencies.append(elapsed * 1000)
+            queries.append(metrics.queries)
+            db_times.append(metrics.db_time * 1000)
+            statuses.add(response.status_code)
+
+        latencies.sort()
+        return {
+            'route': case.route,
+            'method': case.method.upper(),
+            'path': case.path,
+            'statuses': sorted(statuses),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'queries': round(statistics.fmean(queries), 2),
+            'queries_max': max(queries),
+            'db_ms': round(statistics.fmean(db_times), 3),
+        }
+
+    def print_report(self, report, baseline):
+        meta = report['meta']
+        self.stdout.write(
+            f"{meta['iterations']} call(s) per case on {meta['database']} "
+            + ', '.join(f"{count} {name}" for name, count in meta['rows'].items())
+            + (" (cold cache)" if meta['cold'] else "")
+        )
+        self.stdout.write(f"  {'case':<26}{'status':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'db ms':>8}")
+        for name, result in report['results'].items():
+            line = (
+                f"  {name:<26}{','.join(map(str, result['statuses'])):>8}{result['p50_ms']:9.2f}"
+                f"{result['p95_ms']:9.2f}{result['p99_ms']:9.2f}{result['queries']:9.1f}{result['db_ms']:8.2f}"
+            )
+            previous = (baseline or {}).get(name)
+            if previous:
+                change = (result['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100 if previous['p50_ms'] else 0
+                line += f"  p50 {change:+.0f}%  queries {result['queries'] - previous['queries']:+.1f}"
+            self.stdout.write(line)
+        if report['uncovered']:
+            self.stdout.write(self.style.WARNING(f"Not benchmarked: {', '.join(report['uncovered'])}"))
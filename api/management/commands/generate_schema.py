@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blood_bank.docs import OPENAPI_SCHEMA_FILE, render_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema into OPENAPI_SCHEMA_FILE. Run it on every "
+        "API change; /swagger/ and /redoc/ serve the file outside DEBUG."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(OPENAPI_SCHEMA_FILE))
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Exit with an error if the file is missing or out of date, instead of writing it.",
+        )
+
+    def handle(self, *args, **options):
+        content = render_schema()
+        path = options['output']
+
+        if options['check']:
+            try:
+                with open(path, 'rb') as handle:
+                    current = handle.read()
+            except FileNotFoundError:
+                current = None
+            if current != content:
+                raise CommandError(f"{path} is out of date; run `manage.py generate_schema`.")
+            self.stdout.write(f"{path} is up to date.")
+            return
+
+        with open(path, 'wb') as handle:
+            handle.write(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(content)} bytes to {path}"))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import User
+from api.cache import DONORS, REQUESTS, invalidate_responses
+from api.geo import apply_location
+from blood_request.models import BloodRequest
+
+LOCATION_FIELDS = ['district', 'upazila', 'latitude', 'longitude', 'geohash']
+
+
+class Command(BaseCommand):
+    help = "Resolve district, coordinates and geohash for users and blood requests from the bundled gazetteer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--all', action='store_true', help="Re-geocode rows that already have coordinates.")
+
+    def geocode(self, queryset, text_field, chunk_size, everything):
+        if not everything:
+            queryset = queryset.filter(geohash__isnull=True)
+        queryset = queryset.only('id', text_field, *LOCATION_FIELDS).order_by('id')
+        # bulk_update() skips auto_now, so models that track it get it here.
+        tracks_updates = any(field.name == 'updated_at' for field in queryset.model._meta.concrete_fields)
+        fields = [*LOCATION_FIELDS, 'updated_at'] if tracks_updates else LOCATION_FIELDS
+        now = timezone.now()
+
+        changed = []
+        updated = 0
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            if everything:
+                instance.latitude = instance.longitude = None
+            apply_location(instance, getattr(instance, text_field))
+            if instance.geohash is None:
+                continue
+            if tracks_updates:
+                instance.updated_at = now
+            changed.append(instance)
+            if len(changed) >= chunk_size:
+                queryset.model.objects.bulk_update(changed, fields)
+                updated += len(changed)
+                changed = []
+
+        if changed:
+            queryset.model.objects.bulk_update(changed, fields)
+            updated += len(changed)
+        return updated
+
+    def handle(self, *args, **options):
+        chunk_size, everything = options['chunk_size'], options['all']
+        users = self.geocode(User.objects.all(), 'address', chunk_size, everything)
+        requests = self.geocode(BloodRequest.objects.all(), 'hospital_name', chunk_size, everything)
+        invalidate_responses(DONORS, REQUESTS)
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {users} user(s) and {requests} blood request(s)."))
@@ -0,0 +1,55 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def wsgi_module():
+    return settings.WSGI_APPLICATION.rsplit('.', 1)[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the WSGI app in a fresh interpreter under -X importtime and report where "
+        "the cold-start import time goes, by top-level package and by module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default=None, help="Module to import (default: the WSGI module).")
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        module = options['module'] or wsgi_module()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "Import failed.")
+
+        by_package = Counter()
+        modules = []
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            self_us, cumulative_us, name = int(match[1]), int(match[2]), match[4]
+            by_package[name.split('.')[0]] += self_us
+            modules.append((cumulative_us, self_us, len(match[3]) // 2, name))
+
+        total = sum(by_package.values())
+        self.stdout.write(f"Importing {module}: {total / 1000:.1f} ms in {len(modules)} modules\n")
+
+        self.stdout.write("By top-level package (self time):")
+        for package, self_us in by_package.most_common(options['top']):
+            self.stdout.write(f"  {self_us / 1000:8.1f} ms  {self_us / total:5.1%}  {package}")
+
+        self.stdout.write("\nSlowest imports (cumulative, nesting depth):")
+        for cumulative_us, self_us, depth, name in sorted(modules, reverse=True)[:options['top']]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  depth {depth:<2} {name}")
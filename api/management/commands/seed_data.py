@@ -0,0 +1,171 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from api.cache import DONORS, REQUESTS, invalidate_responses
+from api.geo import encode_geohash, gazetteer
+from blood_request.models import BloodRequest
+from donors.importer import unusable_password
+from donors.models import DonationTransaction, DonorProfile
+
+FIRST_NAMES = ['Rahim', 'Karim', 'Ayesha', 'Fatema', 'Nusrat', 'Tanvir', 'Sadia', 'Imran', 'Farhan', 'Mitu']
+LAST_NAMES = ['Hossain', 'Islam', 'Rahman', 'Ahmed', 'Chowdhury', 'Khan', 'Sarker', 'Das', 'Uddin', 'Akter']
+# Roughly the blood group distribution in Bangladesh.
+BLOOD_GROUP_WEIGHTS = {'O+': 31, 'O-': 1, 'A+': 26, 'A-': 1, 'B+': 32, 'B-': 1, 'AB+': 7, 'AB-': 1}
+TRANSACTION_STATUSES = {DonationTransaction.SUCCESS: 80, DonationTransaction.FAILED: 12, DonationTransaction.PENDING: 8}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate reproducible synthetic users, donor profiles, blood requests (with "
+        "donors) and donation transactions with bulk_create, for benchmarking. Runs "
+        "add to earlier ones; do not point it at production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--donor-ratio', type=float, default=0.7, help="Share of users with a donor profile.")
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--max-donors', type=int, default=3, help="Most donors attached to one request.")
+        parser.add_argument('--transactions', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=13107)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['donor_ratio'] <= 1:
+            raise CommandError("--donor-ratio must be between 0 and 1.")
+        if options['users'] < 1 and (options['requests'] or options['transactions']):
+            raise CommandError("Requests and transactions need --users of at least 1.")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.today = timezone.now().date()
+        self.places = self.load_places()
+        # Email numbering continues after earlier runs.
+        self.offset = User.objects.filter(email__endswith='@seed.example.com').count()
+
+        user_ids, donor_ids = self.create_users(options['users'], options['donor_ratio'])
+        requests = self.create_requests(options['requests'], user_ids, donor_ids, options['max_donors'])
+        transactions = self.create_transactions(options['transactions'], user_ids)
+        invalidate_responses(REQUESTS, DONORS)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(user_ids)} user(s), {len(donor_ids)} donor profile(s), "
+            f"{requests} request(s) and {transactions} transaction(s)."
+        ))
+
+    def load_places(self):
+        _, upazilas = gazetteer()
+        return sorted(
+            (upazila['district'], upazila['name'], upazila['lat'], upazila['lon'])
+            for candidates in upazilas.values() for upazila in candidates
+        )
+
+    def place(self):
+        """district, upazila, latitude, longitude and geohash within ~2km of a gazetteer entry."""
+        district, upazila, latitude, longitude = self.rng.choice(self.places)
+        latitude += self.rng.uniform(-0.02, 0.02)
+        longitude += self.rng.uniform(-0.02, 0.02)
+        return district, upazila, latitude, longitude, encode_geohash(latitude, longitude)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def create_users(self, total, donor_ratio):
+        groups, weights = zip(*BLOOD_GROUP_WEIGHTS.items())
+        user_ids, donor_ids = [], []
+        for batch in self.batches(total):
+            users = []
+            for index in batch:
+                district, upazila, latitude, longitude, geohash = self.place()
+                users.append(User(
+                    email=f"donor{self.offset + index}@seed.example.com",
+                    password=unusable_password(),
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    phone_number=f"01{self.rng.randint(300000000, 999999999)}",
+                    address=f"{upazila}, {district}",
+                    district=district, upazila=upazila,
+                    latitude=latitude, longitude=longitude, geohash=geohash,
+                ))
+
+            with transaction.atomic():
+                users = User.objects.bulk_create(users)
+                profiles = []
+                for user in users:
+                    if self.rng.random() >= donor_ratio:
+                        continue
+                    last_donation = None
+                    if self.rng.random() < 0.6:
+                        last_donation = self.today - timedelta(days=self.rng.randint(1, 365))
+                    profile = DonorProfile(
+                        user_id=user.pk,
+                        blood_group=self.rng.choices(groups, weights)[0],
+                        age=self.rng.randint(18, 60),
+                        last_donation_date=last_donation,
+                        next_eligible_date=DonorProfile.compute_next_eligible_date(last_donation),
+                    )
+                    profile.is_available = profile.is_eligible(self.today)
+                    profiles.append(profile)
+                DonorProfile.objects.bulk_create(profiles)
+
+            user_ids += [user.pk for user in users]
+            donor_ids += [profile.user_id for profile in profiles]
+            self.stdout.write(f"  users: {len(user_ids)}/{total}")
+        return user_ids, donor_ids
+
+    def create_requests(self, total, user_ids, donor_ids, max_donors):
+        Donors = BloodRequest.donors.through
+        groups, weights = zip(*BLOOD_GROUP_WEIGHTS.items())
+        created = 0
+        for batch in self.batches(total):
+            requests, chosen = [], []
+            for _ in batch:
+                district, upazila, latitude, longitude, geohash = self.place()
+                bags = self.rng.randint(1, 4)
+                donors = self.rng.sample(donor_ids, min(len(donor_ids), self.rng.randint(0, max_donors)))
+                requests.append(BloodRequest(
+                    recipient_id=self.rng.choice(user_ids),
+                    blood_group=self.rng.choices(groups, weights)[0],
+                    bags_needed=bags,
+                    hospital_name=f"{district} Medical College Hospital",
+                    district=district, upazila=upazila,
+                    latitude=latitude, longitude=longitude, geohash=geohash,
+                    donation_date=self.today + timedelta(days=self.rng.randint(-60, 30)),
+                    donors_count=len(donors),
+                    is_fulfilled=len(donors) >= bags,
+                ))
+                chosen.append(donors)
+
+            with transaction.atomic():
+                requests = BloodRequest.objects.bulk_create(requests)
+                Donors.objects.bulk_create([
+                    Donors(bloodrequest_id=blood_request.pk, user_id=donor)
+                    for blood_request, donors in zip(requests, chosen)
+                    for donor in donors
+                ])
+            created += len(requests)
+            self.stdout.write(f"  requests: {created}/{total}")
+        return created
+
+    def create_transactions(self, total, user_ids):
+        statuses, weights = zip(*TRANSACTION_STATUSES.items())
+        created = 0
+        for batch in self.batches(total):
+            DonationTransaction.objects.bulk_create([
+                DonationTransaction(
+                    user_id=self.rng.choice(user_ids),
+                    amount=Decimal(self.rng.choice([100, 200, 500, 1000, 2000])),
+                    status=self.rng.choices(statuses, weights)[0],
+                )
+                for _ in batch
+            ])
+            created += len(batch)
+            self.stdout.write(f"  transactions: {created}/{total}")
+        return created
@@ -0,0 +1,255 @@
+"""
+Per-view request metrics in Prometheus text format. MetricsMiddleware
+records, for every request, the resolved route name (e.g. 'requests-list',
+'payment_success') with its wall time, SQL query count, SQL time and the
+time the renderer spent encoding the response body into in-process
+histograms; the `metrics` view exports them at /metrics. Serializer work
+(`serializer.data`) happens inside the view and counts as view time, not
+render time.
+
+Queries are timed by an execute_wrapper installed on every connection and
+attributed to the request through a context variable, so queries an async
+view runs through sync_to_async (on another thread's connection) are
+counted too. The cost is a couple of perf_counter() calls per query and
+one lock per request, well under a millisecond. Requests issuing more than
+METRICS_QUERY_THRESHOLD queries are logged and counted.
+
+Metrics are per process, like Prometheus' own client: scrape every worker.
+"""
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+
+from api.cache import response_cache_stats
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = getattr(settings, 'METRICS_ENABLED', True)
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', '')
+METRICS_QUERY_THRESHOLD = getattr(settings, 'METRICS_QUERY_THRESHOLD', 20)
+
+PREFIX = 'bloodbank'
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+HISTOGRAMS = {
+    'request_duration_seconds': ("Wall time of the request.", SECONDS_BUCKETS),
+    'db_queries': ("SQL queries issued by the request.", QUERY_BUCKETS),
+    'db_duration_seconds': ("Time spent executing SQL.", SECONDS_BUCKETS),
+    'response_render_duration_seconds': (
+        "Time the renderer spent encoding the response body after the view returned.", SECONDS_BUCKETS,
+    ),
+}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        # Buckets are stored per range and made cumulative on export.
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.histograms = {name: {} for name in HISTOGRAMS}
+        self.requests = defaultdict(int)
+        self.over_threshold = defaultdict(int)
+
+    def observe(self, view, method, status, values, flagged):
+        with self.lock:
+            for name, value in values.items():
+                histogram = self.histograms[name].get(view)
+                if histogram is None:
+                    histogram = self.histograms[name][view] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+            self.requests[view, method, status] += 1
+            if flagged:
+                self.over_threshold[view] += 1
+
+    def export(self):
+        lines = []
+        with self.lock:
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                metric = f"{PREFIX}_{name}"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for view, histogram in sorted(self.histograms[name].items()):
+                    label = f'view="{escape(view)}"'
+                    total = 0
+                    for bound, count in zip(buckets + ('+Inf',), histogram.counts):
+                        total += count
+                        lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {total}')
+                    lines.append(f"{metric}_sum{{{label}}} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{{{label}}} {total}")
+
+            metric = f"{PREFIX}_requests_total"
+            lines += [f"# HELP {metric} Requests by view, method and status.", f"# TYPE {metric} counter"]
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(f'{metric}{{view="{escape(view)}",method="{method}",status="{status}"}} {count}')
+
+            metric = f"{PREFIX}_query_threshold_exceeded_total"
+            lines += [
+                f"# HELP {metric} Requests issuing more than {METRICS_QUERY_THRESHOLD} SQL queries.",
+                f"# TYPE {metric} counter",
+            ]
+            for view, count in sorted(self.over_threshold.items()):
+                lines.append(f'{metric}{{view="{escape(view)}"}} {count}')
+
+        for outcome in ('hits', 'misses'):
+            metric = f"{PREFIX}_response_cache_{outcome}_total"
+            lines += [f"# HELP {metric} Response cache {outcome} by namespace.", f"# TYPE {metric} counter"]
+            for namespace, stats in response_cache_stats().items():
+                lines.append(f'{metric}{{namespace="{namespace}"}} {stats[outcome]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.render_time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+
+
+# The RequestMetrics of the request being served, if any. Context
+# variables follow sync_to_async into its thread, so the wrapper below
+# finds the request whichever thread's connection runs the query.
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_wrapper(connection=connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper, dispatch_uid='api.metrics.install_query_wrapper')
+
+
+class MetricsMiddleware:
+    """
+    Goes first in MIDDLEWARE so the wall time covers the whole stack. Works
+    in both modes, so an ASGI deployment keeps async views async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        # Connections opened before this module was imported missed the
+        # connection_created signal.
+        install_query_wrapper(connection)
+        metrics = request._metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.observe(request, response, metrics, perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        # The thread that runs this request's ORM calls may hold a connection
+        # opened before this module was imported; one hop makes sure it
+        # carries the wrapper.
+        await sync_to_async(install_query_wrapper)()
+        metrics = request._metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.observe(request, response, metrics, perf_counter() - start)
+        return response
+
+    def observe(self, request, response, metrics, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        flagged = metrics.queries > METRICS_QUERY_THRESHOLD
+        if flagged:
+            logger.warning(
+                "%s %s (%s) issued %d SQL queries (threshold %d)",
+                request.method, request.path, view, metrics.queries, METRICS_QUERY_THRESHOLD,
+            )
+        registry.observe(view, request.method, response.status_code, {
+            'request_duration_seconds': duration,
+            'db_queries': metrics.queries,
+            'db_duration_seconds': metrics.db_time,
+            'response_render_duration_seconds': metrics.render_time,
+        }, flagged)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns; by then
+        # the view has already built serializer.data.
+        metrics = request._metrics
+        start = perf_counter()
+
+        def rendered(response):
+            metrics.render_time = perf_counter() - start
+        response.add_post_render_callback(rendered)
+        return response
+
+
+@require_safe
+def metrics(request):
+    """Prometheus scrape target; needs `Authorization: Bearer <METRICS_TOKEN>` outside DEBUG."""
+    if not settings.DEBUG:
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if not METRICS_TOKEN or scheme.lower() != 'bearer' or not constant_time_compare(token, METRICS_TOKEN):
+            return HttpResponseForbidden()
+    return HttpResponse(registry.export(), content_type='text/plain; version=0.0.4; charset=utf-8')
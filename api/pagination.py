@@ -1,4 +1,226 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
 
 class DefaultPagination(PageNumberPagination):
-    page_size = 10
\ No newline at end of file
+    page_size = 10
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a fixed ordering that ends in a unique column.
+    Every page is a range scan starting right after the last row the client
+    saw, so it costs the same however deep the client scrolls and never
+    runs a COUNT(*). The ordering fields must not be nullable, and the
+    keyset ordering replaces any ?ordering= for these pages.
+    """
+    page_size = 10
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        values, reverse = self.decode_cursor(request)
+
+        rows = list(self.page_window(queryset, values, reverse))
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.page = rows
+        return rows
+
+    def window(self, queryset, request):
+        """The rows the requested page is cut from, as an unevaluated queryset."""
+        self.model = queryset.model
+        return self.page_window(queryset, *self.decode_cursor(request))
+
+    def page_window(self, queryset, values, reverse):
+        # At most page_size + 1 rows from the cursor on; the extra row tells
+        # whether there is another page.
+        ordering = self.reversed_ordering() if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.position_filter(values, ordering))
+        return queryset[:self.page_size + 1]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {'type': 'string'},
+        }]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.row_values(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.row_values(self.page[0]), reverse=True)
+
+    def reversed_ordering(self):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def position_filter(self, values, ordering):
+        """
+        Rows strictly after `values` in `ordering`:
+        (a > x) OR (a = x AND b > y) OR ...
+
+        The extra bound on the leading column (a >= x) is redundant, but it
+        lets the database use the index as a range scan.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        leading = ordering[0]
+        lookup = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{f'{leading.lstrip("-")}__{lookup}': values[0]}) & condition
+
+    def row_values(self, row):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def encode_cursor(self, values, reverse):
+        payload = {'v': [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]}
+        if reverse:
+            payload['r'] = 1
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            raw_values = payload['v']
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            values = [
+                self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, raw_values)
+            ]
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, bool(payload.get('r'))
+
+
+class SelectablePagination(BasePagination):
+    """
+    Page numbers by default, so existing clients keep working;
+    ?pagination=cursor switches the same endpoint to keyset pagination.
+    """
+    pagination_query_param = 'pagination'
+    page_number_class = DefaultPagination
+    cursor_class = KeysetPagination
+
+    def __init__(self):
+        self.paginator = self.page_number_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.pagination_query_param) == 'cursor':
+            self.paginator = self.cursor_class()
+        else:
+            self.paginator = self.page_number_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def keyset_window(self, queryset, request):
+        """The rows of the requested keyset page, or None for page numbers."""
+        if request.query_params.get(self.pagination_query_param) != 'cursor':
+            return None
+        return self.cursor_class().window(queryset, request)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_number_class().get_schema_operation_parameters(view),
+            *self.cursor_class().get_schema_operation_parameters(view),
+            {
+                'name': self.pagination_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" for keyset pagination.',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+        ]
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.paginator.to_html() if self.display_page_controls else ''
+
+
+class RequestCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class DonorCursorPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class TransactionCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class RequestPagination(SelectablePagination):
+    cursor_class = RequestCursorPagination
+
+
+class DonorPagination(SelectablePagination):
+    cursor_class = DonorCursorPagination
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from functools import reduce
+import operator
+
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+
+def trigrams(text):
+    """
+    pg_trgm-style trigrams: lowercased words padded with two spaces in front
+    and one behind, so short words and word starts still match.
+    """
+    grams = set()
+    for word in (text or '').lower().split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """
+    In-process inverted trigram index, the stand-in for the pg_trgm GIN
+    indexes on databases without them (SQLite in tests and local runs). It
+    is built from every row of the filtered queryset on each search, so it
+    is not meant for production-sized tables.
+    """
+    def __init__(self, rows):
+        self.postings = defaultdict(set)
+        for pk, *texts in rows:
+            for gram in trigrams(' '.join(text or '' for text in texts)):
+                self.postings[gram].add(pk)
+
+    def search(self, term, threshold, limit=None):
+        """
+        Returns {pk: score} for at most `limit` best rows, where score is the
+        share of the term's trigrams found in the row (an approximation of
+        pg_trgm word_similarity).
+        """
+        grams = trigrams(term)
+        if not grams:
+            return {}
+        hits = defaultdict(int)
+        for gram in grams:
+            for pk in self.postings.get(gram, ()):
+                hits[pk] += 1
+        scores = [(count / len(grams), pk) for pk, count in hits.items() if count / len(grams) >= threshold]
+        scores.sort(reverse=True)
+        return {pk: score for score, pk in scores[:limit]}
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter with typo-tolerant, ranked matching on the view's
+    `trigram_search_fields`. On PostgreSQL those fields match through the
+    pg_trgm word-similarity operator or a plain substring match, both served
+    by their GIN indexes, and results are ranked by similarity; other
+    databases fall back to NgramIndex.
+
+    Terms that are one of the values listed in the view's
+    `exact_search_fields` ({field: values}, e.g. blood groups) become an
+    equality filter on that field instead of a text match, so the text
+    match never has to OR in an unindexed column. An explicit ?ordering=
+    overrides the ranking on views with an OrderingFilter.
+    """
+    # pg_trgm's default word_similarity_threshold, used by the fallback.
+    similarity_threshold = 0.6
+    # Most rows the fallback ranks; more would make the CASE unwieldy.
+    fallback_limit = 1000
+    rank_annotation = 'search_rank'
+
+    def filter_queryset(self, request, queryset, view):
+        fuzzy_fields = getattr(view, 'trigram_search_fields', None)
+        terms = self.get_search_terms(request)
+        if not fuzzy_fields or not terms:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset, terms = self.filter_exact_values(queryset, terms, getattr(view, 'exact_search_fields', {}))
+        if terms:
+            term = ' '.join(terms)
+            exact = self.substring_filter(terms, fuzzy_fields)
+            if connections[queryset.db].vendor == 'postgresql':
+                queryset = self.filter_postgres(queryset, term, fuzzy_fields, exact)
+            else:
+                queryset = self.filter_ngram(queryset, term, fuzzy_fields, exact)
+        else:
+            queryset = queryset.annotate(**{self.rank_annotation: Value(0.0, output_field=FloatField())})
+
+        if not (request.query_params.get(api_settings.ORDERING_PARAM) and self.view_orders(view)):
+            queryset = queryset.order_by(f'-{self.rank_annotation}', '-pk')
+        return queryset
+
+    def view_orders(self, view):
+        return any(issubclass(backend, filters.OrderingFilter) for backend in getattr(view, 'filter_backends', ()))
+
+    def filter_exact_values(self, queryset, terms, exact_fields):
+        """Applies the terms that name an `exact_search_fields` value; returns the rest."""
+        rest = []
+        for bit in terms:
+            fields = [field for field, values in exact_fields.items() if bit.upper() in values]
+            if fields:
+                queryset = queryset.filter(reduce(operator.or_, [Q(**{field: bit.upper()}) for field in fields]))
+            else:
+                rest.append(bit)
+        return queryset, rest
+
+    def substring_filter(self, terms, fuzzy_fields):
+        # Same semantics as SearchFilter, over the trigram-indexed fields
+        # only: every term has to appear in at least one of them.
+        return reduce(operator.and_, [
+            reduce(operator.or_, [Q(**{f'{field}__icontains': bit}) for field in fuzzy_fields])
+            for bit in terms
+        ])
+
+    def filter_postgres(self, queryset, term, fuzzy_fields, exact):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        similarities = [TrigramWordSimilarity(term, field) for field in fuzzy_fields]
+        rank = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+        fuzzy = reduce(operator.or_, [Q(**{f'{field}__trigram_word_similar': term}) for field in fuzzy_fields])
+        return queryset.filter(fuzzy | exact).annotate(**{self.rank_annotation: rank})
+
+    def filter_ngram(self, queryset, term, fuzzy_fields, exact):
+        index = NgramIndex(queryset.values_list('pk', *fuzzy_fields))
+        scores = index.search(term, self.similarity_threshold, self.fallback_limit)
+        rank = Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.filter(Q(pk__in=list(scores)) | exact).annotate(**{self.rank_annotation: rank})
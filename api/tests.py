@@ -1,3 +1,451 @@
+import json
+import re
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from api.cache import response_cache, response_cache_stats
+from api.metrics import MetricsMiddleware, registry
+from api.search import NgramIndex, trigrams
+from blood_request.gateway import GatewayError
+from blood_request.models import BloodRequest
+from donors.models import DonationTransaction, DonorProfile
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        recipient = User.objects.create_user(email='recipient@example.com', password='pass12345')
+        created_at = timezone.now()
+        requests = [
+            BloodRequest.objects.create(recipient=recipient, blood_group='B+')
+            for _ in range(25)
+        ]
+        # Several rows share a timestamp so the id tie-breaker is exercised.
+        for index, blood_request in enumerate(requests):
+            BloodRequest.objects.filter(pk=blood_request.pk).update(
+                created_at=created_at - timedelta(minutes=index // 4)
+            )
+        self.expected = list(
+            BloodRequest.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        seen = []
+        url = '/api/v1/requests/?pagination=cursor'
+        while url:
+            data = self.client.get(url).data
+            self.assertNotIn('count', data)
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get('/api/v1/requests/?pagination=cursor').data
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(
+            [row['id'] for row in back['results']],
+            [row['id'] for row in first['results']],
+        )
+
+    def test_page_numbers_remain_the_default(self):
+        data = self.client.get('/api/v1/requests/').data
+        self.assertEqual(data['count'], 25)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/v1/requests/?pagination=cursor&cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.recipient = User.objects.create_user(email='recipient@example.com', password='pass12345')
+        BloodRequest.objects.create(recipient=self.recipient, blood_group='O+')
+
+    def test_repeat_listing_is_served_without_queries(self):
+        first = self.client.get('/api/v1/requests/?blood_group=O%2B&page=1')
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/requests/?page=1&blood_group=O%2B&district=')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(response_cache_stats()['requests'], {'hits': 1, 'misses': 1})
+
+    def test_writes_invalidate_the_namespace(self):
+        self.client.get('/api/v1/requests/')
+        with self.captureOnCommitCallbacks(execute=True):
+            BloodRequest.objects.create(recipient=self.recipient, blood_group='A+')
+        response = self.client.get('/api/v1/requests/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+        self.client.get('/api/v1/donors/')
+        with self.captureOnCommitCallbacks(execute=True):
+            DonorProfile.objects.create(user=self.recipient, blood_group='O+', age=30)
+        self.assertEqual(self.client.get('/api/v1/donors/').data['count'], 1)
+
+    def test_invalidation_waits_for_the_commit(self):
+        self.client.get('/api/v1/requests/')
+        with self.captureOnCommitCallbacks() as callbacks:
+            BloodRequest.objects.create(recipient=self.recipient, blood_group='A+')
+            # A read before the commit still gets the old generation's page.
+            self.assertEqual(self.client.get('/api/v1/requests/')['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get('/api/v1/requests/').data['count'], 2)
+
+    def test_signed_in_callers_get_their_own_entries(self):
+        self.assertEqual(self.client.get('/api/v1/requests/').data['count'], 1)
+
+        self.client.force_authenticate(self.recipient)
+        response = self.client.get('/api/v1/requests/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 0)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='donor@example.com', password='pass12345')
+        self.profile = DonorProfile.objects.create(user=self.user, blood_group='B+', age=28)
+        self.blood_request = BloodRequest.objects.create(recipient=self.user, blood_group='B+')
+
+    def test_unchanged_list_answers_304_without_queries(self):
+        first = self.client.get('/api/v1/donors/')
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/donors/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_validator_is_checked_before_serializing_on_a_miss(self):
+        with mock.patch('api.cache.RESPONSE_CACHE_TIMEOUT', 0):
+            first = self.client.get('/api/v1/donors/')
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/v1/donors/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response['Last-Modified'], first['Last-Modified'])
+
+    def test_keyset_pages_validate_without_counting_the_table(self):
+        url = '/api/v1/requests/?pagination=cursor'
+        with mock.patch('api.cache.RESPONSE_CACHE_TIMEOUT', 0):
+            first = self.client.get(url)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        self.assertEqual(len(ctx), 1)
+        self.assertIn('LIMIT', ctx[0]['sql'])
+
+    def test_list_filters_once_on_a_miss(self):
+        with mock.patch('api.search.TrigramSearchFilter.filter_queryset', autospec=True, side_effect=lambda self, request, queryset, view: queryset) as search:
+            response = self.client.get('/api/v1/requests/?search=dhaka')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(search.call_count, 1)
+
+    def test_writes_change_the_validator(self):
+        first = self.client.get('/api/v1/requests/')
+        self.assertNotEqual(self.client.get('/api/v1/requests/?blood_group=B%2B')['ETag'], first['ETag'])
+
+        self.blood_request.bags_needed = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            self.blood_request.save()
+        response = self.client.get('/api/v1/requests/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_and_dashboard(self):
+        url = f'/api/v1/requests/{self.blood_request.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.force_authenticate(self.user)
+        etag = self.client.get('/api/v1/dashboard/')['ETag']
+        self.assertEqual(self.client.get('/api/v1/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/v1/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TrigramSearchTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.client = APIClient()
+        recipient = User.objects.create_user(email='recipient@example.com', password='pass12345')
+        self.requests = {
+            name: BloodRequest.objects.create(recipient=recipient, hospital_name=name, blood_group=group, bags_needed=bags)
+            for name, group, bags in [
+                ('Dhaka Medical College', 'A+', 2),
+                ('Square Hospital', 'B+', 1),
+                ('Dhaka Shishu Hospital', 'O-', 3),
+                ('Chittagong Medical College', 'A+', 4),
+            ]
+        }
+        self.donors = {}
+        for name, address, group, age in [
+            ('mirpur', 'Mirpur Dhaka', 'A+', 40),
+            ('dhanmondi', 'Dhanmondi Dhaka', 'O-', 25),
+            ('agrabad', 'Agrabad Chittagong', 'A+', 30),
+        ]:
+            user = User.objects.create_user(email=f'{name}@example.com', password='pass12345', address=address)
+            self.donors[name] = DonorProfile.objects.create(user=user, blood_group=group, age=age).id
+
+    def hospitals(self, query):
+        response = self.client.get(f'/api/v1/requests/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['hospital_name'] for row in response.data['results']]
+
+    def donor_names(self, query):
+        response = self.client.get(f'/api/v1/donors/?{query}')
+        self.assertEqual(response.status_code, 200)
+        names = {pk: name for name, pk in self.donors.items()}
+        return [names[row['id']] for row in response.data['results']]
+
+    def test_trigrams_pad_words_like_pg_trgm(self):
+        self.assertEqual(trigrams('AB'), {'  a', ' ab', 'ab '})
+        index = NgramIndex([(1, 'Dhaka Medical'), (2, 'Square Hospital')])
+        self.assertEqual(list(index.search('dhaka medcal', 0.6)), [1])
+        self.assertEqual(index.search('hospital', 0.6, limit=1), {2: 1.0})
+
+    def test_typos_still_match(self):
+        self.assertEqual(self.hospitals('search=dhaka medcal'), ['Dhaka Medical College'])
+        self.assertEqual(self.donor_names('search=mirpr'), ['mirpur'])
+
+    def test_closer_matches_rank_first(self):
+        self.assertEqual(self.hospitals('search=dhaka hospital'), ['Dhaka Shishu Hospital', 'Square Hospital'])
+
+    def test_substrings_below_the_threshold_still_match(self):
+        self.assertEqual(
+            sorted(self.hospitals('search=edic')), ['Chittagong Medical College', 'Dhaka Medical College'],
+        )
+
+    def test_blood_groups_filter_by_equality(self):
+        self.assertEqual(sorted(self.hospitals('search=a%2B')), ['Chittagong Medical College', 'Dhaka Medical College'])
+        self.assertEqual(self.hospitals('search=dhaka A%2B'), ['Dhaka Medical College'])
+        self.assertEqual(self.donor_names('search=dhaka a%2B'), ['mirpur'])
+
+    def test_ordering_overrides_the_ranking(self):
+        self.assertEqual(self.hospitals('search=hospital'), ['Dhaka Shishu Hospital', 'Square Hospital'])
+        self.assertEqual(self.hospitals('search=hospital&ordering=bags_needed'), ['Square Hospital', 'Dhaka Shishu Hospital'])
+
+        self.assertEqual(self.donor_names('search=dhaka'), ['dhanmondi', 'mirpur'])
+        self.assertEqual(self.donor_names('search=dhaka&ordering=-age'), ['mirpur', 'dhanmondi'])
+
+
+class PrecomputedSchemaTests(TestCase):
+    def test_committed_schema_is_current(self):
+        out = StringIO()
+        call_command('generate_schema', '--check', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+    @mock.patch('drf_yasg.generators.OpenAPISchemaGenerator.get_schema', side_effect=AssertionError)
+    def test_docs_are_served_from_the_file_with_cache_headers(self, get_schema):
+        client = APIClient()
+        response = client.get('/swagger/', {'format': 'openapi'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['info']['title'], 'Blood Bank API')
+        self.assertIn('max-age=86400', response['Cache-Control'])
+        self.assertEqual(
+            client.get('/redoc/', {'format': 'openapi'}, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304,
+        )
+
+        page = client.get('/redoc/')
+        self.assertContains(page, '<title>Blood Bank API</title>', html=False)
+        self.assertNotEqual(page['ETag'], response['ETag'])
+        get_schema.assert_not_called()
+
+
+class HealthTests(TestCase):
+    def test_reports_the_database_and_connection_mode(self):
+        with self.assertNumQueries(1):
+            response = APIClient().get('/api/v1/health/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['database'], 'ok')
+        self.assertEqual(response.json()['mode'], settings.DB_CONN_MODE)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    @mock.patch('api.metrics.METRICS_TOKEN', 'scrape-token')
+    def test_views_are_recorded_and_exported(self):
+        client = APIClient()
+        client.get('/api/v1/requests/')
+        self.assertEqual(client.get('/metrics').status_code, 403)
+
+        response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        body = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('bloodbank_db_queries_count{view="requests-list"} 1', body)
+        self.assertIn('bloodbank_response_render_duration_seconds_bucket{view="requests-list",le="+Inf"} 1', body)
+        self.assertIn('bloodbank_requests_total{view="requests-list",method="GET",status="200"} 1', body)
+        self.assertIn('bloodbank_response_cache_misses_total{namespace="requests"}', body)
+
+    @mock.patch('api.metrics.METRICS_QUERY_THRESHOLD', 0)
+    def test_requests_over_the_query_threshold_are_flagged(self):
+        with self.assertLogs('api.metrics', 'WARNING'):
+            APIClient().get('/api/v1/health/')
+        self.assertIn('bloodbank_query_threshold_exceeded_total{view="health"} 1', registry.export())
+
+    async def test_async_views_stay_async_and_their_queries_are_counted(self):
+        async def view(request):
+            pass
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(view)))
+
+        user = await sync_to_async(User.objects.create_user)(email='payer@example.com', password='pass12345')
+        gateway = mock.Mock(acreate_session=mock.AsyncMock(side_effect=GatewayError))
+        with mock.patch('blood_request.views.get_gateway', return_value=gateway):
+            response = await self.async_client.post(
+                '/api/v1/payment/initiate/async/', {'amount': 500}, content_type='application/json',
+                headers={'Authorization': f'JWT {AccessToken.for_user(user)}'},
+            )
+        self.assertEqual(response.status_code, 502)
+
+        # The INSERT runs through sync_to_async, off the request's thread.
+        histogram = registry.histograms['db_queries']['initiate-payment-async']
+        self.assertGreaterEqual(histogram.sum, 1)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_seeded_data_benchmarks_every_route_and_rolls_back(self):
+        call_command(
+            'seed_data', users=30, requests=20, transactions=15, batch_size=8, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertFalse(User.objects.filter(geohash=None).exists())
+        self.assertFalse(BloodRequest.objects.filter(donors_count__gt=0, donors=None).exists())
+
+        with tempfile.NamedTemporaryFile(suffix='.json') as handle:
+            call_command('bench_endpoints', iterations=1, warmup=0, output=handle.name, stdout=StringIO())
+            report = json.load(handle)
+
+        self.assertEqual(report['uncovered'], [])
+        failing = {name: result['statuses'] for name, result in report['results'].items() if max(result['statuses']) >= 400}
+        self.assertEqual(failing, {})
+        self.assertEqual(User.objects.count(), 30)
+
+
+def normalize_sql(sql):
+    return re.sub(r"'[^']*'|\b\d+\b", '?', sql)
+
+
+class QueryCountTests(TestCase):
+    """
+    Pins every read endpoint to a query count that does not grow with the
+    number of rows on the page (or of related rows on a detail page). The
+    caches are cleared before every call, so this is the cold path.
+    """
+    SIZES = (1, 3, 9)
+    ENDPOINTS = [
+        ('donors-list', 'anon', '/api/v1/donors/'),
+        ('donors-list cursor', 'anon', '/api/v1/donors/?pagination=cursor'),
+        ('donors-list near', 'anon', '/api/v1/donors/?near=23.8103,90.4125&radius_km=50'),
+        ('donors-detail', 'anon', '/api/v1/donors/{profile}/'),
+        ('requests-list', 'anon', '/api/v1/requests/'),
+        ('requests-list signed in', 'user', '/api/v1/requests/'),
+        ('requests-list cursor', 'anon', '/api/v1/requests/?pagination=cursor'),
+        ('requests-detail', 'anon', '/api/v1/requests/{target}/'),
+        ('requests-candidates', 'user', '/api/v1/requests/{target}/candidates/'),
+        ('my-requests-list', 'user', '/api/v1/my-requests/'),
+        ('my-requests-detail', 'user', '/api/v1/my-requests/{own}/'),
+        ('dashboard-list', 'user', '/api/v1/dashboard/'),
+        ('user-list', 'staff', '/api/v1/auth/users/'),
+        ('user-me', 'user', '/api/v1/auth/users/me/'),
+        ('payment_history', 'user', '/api/v1/payment/history/'),
+        ('payment_export', 'staff', '/api/v1/payment/export/'),
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='me@example.com', password='pass12345', address='Dhaka')
+        self.staff = User.objects.create_user(email='staff@example.com', password='pass12345', is_staff=True)
+        self.profile = DonorProfile.objects.create(user=self.user, blood_group='O-', age=30)
+        self.target = BloodRequest.objects.create(recipient=self.staff, blood_group='AB+', bags_needed=50)
+        self.own = BloodRequest.objects.create(recipient=self.user, blood_group='A+', bags_needed=50)
+        self.donors = []
+        self.clients = {'anon': APIClient()}
+        for role, user in (('user', self.user), ('staff', self.staff)):
+            self.clients[role] = APIClient()
+            self.clients[role].credentials(HTTP_AUTHORIZATION=f'JWT {AccessToken.for_user(user)}')
+
+    def grow(self, size):
+        """Tops every list and related set the endpoints read up to `size` rows."""
+        while len(self.donors) < size:
+            index = len(self.donors)
+            donor = User.objects.create_user(
+                email=f'donor{index}@example.com', password='pass12345', first_name='Donor', address='Dhaka',
+            )
+            DonorProfile.objects.create(user=donor, blood_group=['A+', 'B-', 'O+'][index % 3], age=25)
+            self.donors.append(donor)
+
+            other = BloodRequest.objects.create(recipient=donor, blood_group='B+', hospital_name='Dhaka Medical')
+            other.donors.add(self.user, donor)
+            mine = BloodRequest.objects.create(recipient=self.user, blood_group='O+')
+            mine.donors.add(donor)
+            self.target.donors.add(donor)
+            self.own.donors.add(donor)
+            DonationTransaction.objects.create(user=self.user, amount=100)
+
+    def captured_queries(self, role, path):
+        cache.clear()
+        response = None
+        with CaptureQueriesContext(connection) as context:
+            response = self.clients[role].get(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, path)
+        return [query['sql'] for query in context.captured_queries]
+
+    def report(self, name, runs):
+        counts = ', '.join(f"{len(queries)} queries with {size} row(s)" for size, queries in runs.items())
+        largest = runs[max(runs)]
+        repeated = [
+            f"  {count} x {sql[:300]}"
+            for sql, count in Counter(normalize_sql(sql) for sql in largest).most_common() if count > 1
+        ]
+        listing = [f"  {number}. {sql[:300]}" for number, sql in enumerate(largest, start=1)]
+        return '\n'.join([
+            f"{name}: the query count depends on the page size ({counts}).",
+            "Repeated statements:", *(repeated or ["  none"]),
+            f"Queries with {max(runs)} row(s):", *listing,
+        ])
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        ids = {'profile': self.profile.pk, 'target': self.target.pk, 'own': self.own.pk}
+        runs = {name: {} for name, _, _ in self.ENDPOINTS}
+        for size in self.SIZES:
+            self.grow(size)
+            for name, role, path in self.ENDPOINTS:
+                runs[name][size] = self.captured_queries(role, path.format(**ids))
 
-# Create your tests here.
+        for name, _, _ in self.ENDPOINTS:
+            with self.subTest(name):
+                counts = {len(queries) for queries in runs[name].values()}
+                if len(counts) > 1:
+                    self.fail(self.report(name, runs[name]))
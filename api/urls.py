@@ -3,7 +3,9 @@ from rest_framework.routers import DefaultRouter
 from donors.views import DonorViewSet
 from blood_request.views import BloodRequestViewSet,MyRequestsViewSet
 from dashboard.views import UserDashboardViewSet
-from blood_request.views import initiate_payment,payment_history,payment_success,payment_cancel,payment_fail
+from api.views import health
+from jobs.views import run_jobs
+from blood_request.views import initiate_payment,initiate_payment_async,payment_history,payment_export,payment_success,payment_cancel,payment_fail
 
 router = DefaultRouter()
 router.register('donors', DonorViewSet, basename='donors')
@@ -19,8 +21,12 @@ urlpatterns = [
   
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
+    path('health/', health, name='health'),
+    path('jobs/run/', run_jobs, name='run-jobs'),
     path("payment/initiate/",initiate_payment,name='initiate-payment'),
+    path("payment/initiate/async/",initiate_payment_async,name='initiate-payment-async'),
     path('payment/history/',payment_history, name='payment_history'),
+    path('payment/export/',payment_export, name='payment_export'),
     path('payment/success/', payment_success, name='payment_success'),
     path('payment/fail/', payment_fail, name='payment_fail'),
     path('payment/cancel/', payment_cancel, name='payment_cancel'),
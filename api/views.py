@@ -1,3 +1,26 @@
-from django.shortcuts import render
+import time
 
-# Create your views here.
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+
+@require_safe
+def health(request):
+    """
+    Liveness of the app and its database connection. One round trip, no
+    auth, no ORM, so it is also the target of `manage.py bench_db_connections`.
+    """
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError:
+        return JsonResponse({'database': 'unavailable', 'mode': settings.DB_CONN_MODE}, status=503)
+    return JsonResponse({
+        'database': 'ok',
+        'mode': settings.DB_CONN_MODE,
+        'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+    })
@@ -0,0 +1,125 @@
+"""
+API docs views. drf_yasg pulls in its codecs, jsonschema and yaml, so it
+is only imported when the docs are first requested, not on cold start.
+
+Outside DEBUG the schema is not generated per request: `manage.py
+generate_schema` writes it to OPENAPI_SCHEMA_FILE at build time, and the
+docs pages serve that file (read once per process) with long-lived
+caching headers. DEBUG keeps live generation so schema changes show up
+while developing.
+"""
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+from rest_framework import permissions
+
+OPENAPI_SCHEMA_FILE = getattr(settings, 'OPENAPI_SCHEMA_FILE', settings.BASE_DIR / 'blood_bank' / 'openapi.json')
+DOCS_CACHE_TIMEOUT = getattr(settings, 'DOCS_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+       title="Blood Bank API",
+       default_version='v1',
+       description="API Documentation for Bloodbank Poject",
+       terms_of_service="https://www.google.com/policies/terms/",
+       contact=openapi.Contact(email="naimulh644@gmail.com"),
+       license=openapi.License(name="BSD License"),
+    )
+
+
+@lru_cache(maxsize=1)
+def schema_view():
+    from drf_yasg.views import get_schema_view
+
+    return get_schema_view(
+       api_info(),
+       public=True,
+       permission_classes=(permissions.AllowAny,),
+    )
+
+
+@lru_cache(maxsize=None)
+def ui_view(renderer):
+    return schema_view().with_ui(renderer, cache_timeout=0)
+
+
+def render_schema():
+    """The schema as JSON bytes, generated without a request like at build time."""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(api_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+@lru_cache(maxsize=1)
+def precomputed_schema():
+    """(content, digest, info) of the generated schema file, or None if it is missing."""
+    try:
+        with open(OPENAPI_SCHEMA_FILE, 'rb') as handle:
+            content = handle.read()
+    except FileNotFoundError:
+        return None
+    return content, hashlib.md5(content).hexdigest(), json.loads(content).get('info', {})
+
+
+def cached_response(request, etag, render):
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render()
+        response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=DOCS_CACHE_TIMEOUT)
+    return response
+
+
+def ui_renderer(renderer):
+    from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+
+    return {'swagger': SwaggerUIRenderer, 'redoc': ReDocRenderer}[renderer]()
+
+
+def static_ui(request, renderer):
+    """
+    The docs page for the precomputed schema. The page only loads the spec
+    from ?format=openapi, so it is rendered without generating anything.
+    """
+    schema = precomputed_schema()
+    if schema is None:
+        raise Http404("No generated API schema; run `manage.py generate_schema`.")
+    content, digest, info = schema
+
+    if request.GET.get('format') == 'openapi':
+        def render():
+            return HttpResponse(content, content_type='application/json')
+        return cached_response(request, quote_etag(digest), render)
+
+    def render():
+        page = ui_renderer(renderer)
+        context = {'request': request}
+        page.set_context(context)
+        context.update(title=info.get('title', ''), version=info.get('version', ''))
+        return HttpResponse(render_to_string(page.template, context, request))
+    return cached_response(request, quote_etag(f"{renderer}-{digest}"), render)
+
+
+def docs_view(renderer):
+    @require_safe
+    def view(request, *args, **kwargs):
+        if settings.DEBUG:
+            return ui_view(renderer)(request, *args, **kwargs)
+        return static_ui(request, renderer)
+    return view
+
+
+swagger_ui = docs_view('swagger')
+redoc_ui = docs_view('redoc')
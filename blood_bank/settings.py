@@ -13,9 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
-import cloudinary
-import cloudinary.uploader
-from cloudinary.utils import cloudinary_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,16 +46,19 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'drf_yasg',
     'accounts',
     'donors',
     'blood_request',
     'api',
-    'dashboard'
+    'dashboard',
+    'jobs',
     
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -71,6 +72,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'blood_bank.urls'
 
+# Per-view latency and SQL metrics, scraped from /metrics with
+# `Authorization: Bearer <METRICS_TOKEN>`. Requests over the query
+# threshold are logged and counted.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_QUERY_THRESHOLD = config('METRICS_QUERY_THRESHOLD', default=20, cast=int)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -106,6 +114,23 @@ CORS_ALLOWED_ORIGINS = [
 #     }
 # }
 
+# Connection reuse, picked with DB_CONN_MODE:
+#   persistent - (default) each worker keeps its connection for DB_CONN_MAX_AGE
+#                seconds and pings it before reuse; right for WSGI workers and
+#                for warm serverless instances, which serve one request at a time.
+#   pool       - psycopg 3 connection pool (needs `psycopg[pool]` instead of
+#                psycopg2), DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections per
+#                process; for threaded workers.
+#   pgbouncer  - HOST points at a transaction pooler (PgBouncer, Supabase or
+#                Neon pooler); connections are short-lived and server-side
+#                cursors are off, since they do not survive a transaction pooler.
+#   direct     - connect on every request.
+
+DB_CONN_MODE = config('DB_CONN_MODE', default='persistent')
+DB_CONN_MODES = ('persistent', 'pool', 'pgbouncer', 'direct')
+if DB_CONN_MODE not in DB_CONN_MODES:
+    raise ImproperlyConfigured(f"DB_CONN_MODE must be one of {', '.join(DB_CONN_MODES)}.")
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -113,10 +138,55 @@ DATABASES = {
         'USER': config('user'),
         'PASSWORD': config('password') ,
         'HOST': config('host'),
-        'PORT': config('port')
+        'PORT': config('port'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int) if DB_CONN_MODE == 'persistent' else 0,
+        'CONN_HEALTH_CHECKS': DB_CONN_MODE == 'persistent',
+        'DISABLE_SERVER_SIDE_CURSORS': DB_CONN_MODE == 'pgbouncer',
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
+if DB_CONN_MODE == 'pool':
+    # Django only pools through psycopg 3; requirements.txt ships psycopg2.
+    try:
+        import psycopg  # noqa: F401
+        from psycopg_pool import ConnectionPool
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "DB_CONN_MODE=pool needs psycopg 3 and its pool: pip install 'psycopg[binary,pool]'."
+        ) from exc
+
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+        # Seconds a request waits for a free connection before failing.
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=int),
+        'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=int),
+        # Ping every connection as it is handed out.
+        'check': ConnectionPool.check_connection,
+    }
+
+# Caches
+# Local memory by default; set CACHE_URL (redis://..., needs the redis package)
+# to share the response cache and its invalidation counters between workers.
+
+CACHE_URL = config('CACHE_URL', default='')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    } if CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bondhon',
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=60, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -139,13 +209,14 @@ AUTH_PASSWORD_VALIDATORS = [
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
-# Configuration       
-cloudinary.config( 
-    cloud_name = config('cloud_name'), 
-    api_key = config('cloudinary_api_key'),
-    api_secret = config('api_secret'), # Click 'View API Keys' above to copy your API secret
-    secure=True
-)
+# Cloudinary is configured from this dict by cloudinary_storage the first time
+# the media storage is used, so the SDK stays out of the cold start.
+CLOUDINARY_STORAGE = {
+    'CLOUD_NAME': config('cloud_name'),
+    'API_KEY': config('cloudinary_api_key'),
+    'API_SECRET': config('api_secret'), # Click 'View API Keys' above to copy your API secret
+    'SECURE': True,
+}
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
 LANGUAGE_CODE = 'en-us'
@@ -164,6 +235,11 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedStaticFilesStorage"
 
+# Written by `manage.py generate_schema`; served by /swagger/ and /redoc/
+# outside DEBUG instead of generating the schema per request.
+OPENAPI_SCHEMA_FILE = BASE_DIR / 'blood_bank' / 'openapi.json'
+DOCS_CACHE_TIMEOUT = 60 * 60 * 24
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = BASE_DIR/'media'
@@ -186,17 +262,30 @@ DJOSER = {
     'SERIALIZERS':{
         'user_create': 'accounts.serializers.UserCreateSerializer',
         'current_user': 'accounts.serializers.UserSerializer',
+        'password_reset': 'accounts.serializers.PasswordResetSerializer',
+        'resend_activation': 'accounts.serializers.PasswordResetSerializer',
+    },
+    # Rendered in the request, sent by the job worker (`manage.py run_jobs`).
+    'EMAIL': {
+        'activation': 'accounts.email.ActivationEmail',
+        'confirmation': 'accounts.email.ConfirmationEmail',
+        'password_reset': 'accounts.email.PasswordResetEmail',
+        'password_changed_confirmation': 'accounts.email.PasswordChangedConfirmationEmail',
+        'username_changed_confirmation': 'accounts.email.UsernameChangedConfirmationEmail',
+        'username_reset': 'accounts.email.UsernameResetEmail',
     },
 }
 
 REST_FRAMEWORK = {
     'COERCE_DECIMAL_TO_STRING': False,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
 }
 
 SWAGGER_SETTINGS = {
+   # The API only takes JWTs, and the docs pages are cached publicly.
+   'USE_SESSION_AUTH': False,
    'SECURITY_DEFINITIONS': {
       'Bearer': {
             'type': 'apiKey',
@@ -214,6 +303,40 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', cast=bool)
 EMAIL_PORT = config('EMAIL_PORT')
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=20, cast=int)
+
+# Background jobs (jobs app): Djoser emails and donor notifications. Run
+# `manage.py run_jobs` where a long-lived process is possible. On Vercel the
+# `crons` entry in vercel.json calls /api/v1/jobs/run/ every minute (cron
+# schedules that frequent need a Pro plan; on Hobby point an external
+# scheduler at it) with `Authorization: Bearer <CRON_SECRET>`, Vercel's own
+# cron secret, so set CRON_SECRET (or JOBS_CRON_TOKEN) in the project.
+# Without it nothing drains the queue, activation and password-reset emails
+# never leave, so it is required outside DEBUG.
+JOBS_BATCH_SIZE = config('JOBS_BATCH_SIZE', default=50, cast=int)
+JOBS_RETRY_BASE_SECONDS = config('JOBS_RETRY_BASE_SECONDS', default=30, cast=int)
+JOBS_CRON_TOKEN = config('JOBS_CRON_TOKEN', default=config('CRON_SECRET', default=''))
+if not JOBS_CRON_TOKEN and not DEBUG:
+    raise ImproperlyConfigured("Set CRON_SECRET (or JOBS_CRON_TOKEN) so the job queue's cron hook can run.")
+
+# New blood requests are emailed to eligible, compatible donors in chunks of
+# NOTIFY_CHUNK_SIZE, one chunk every NOTIFY_CHUNK_INTERVAL; a donor gets at
+# most NOTIFY_DONOR_LIMIT of them a day.
+NOTIFY_CHUNK_SIZE = config('NOTIFY_CHUNK_SIZE', default=100, cast=int)
+NOTIFY_CHUNK_INTERVAL = timedelta(seconds=config('NOTIFY_CHUNK_INTERVAL_SECONDS', default=2, cast=float))
+NOTIFY_DONOR_LIMIT = config('NOTIFY_DONOR_LIMIT', default=3, cast=int)
+
+SSLCOMMERZ = {
+    'STORE_ID': config('SSLCOMMERZ_STORE_ID', default='bondh69a2b4734c5ba'),
+    'STORE_PASS': config('SSLCOMMERZ_STORE_PASS', default='bondh69a2b4734c5ba@ssl'),
+    'IS_SANDBOX': config('SSLCOMMERZ_IS_SANDBOX', default=True, cast=bool),
+    # Point at `manage.py run_gateway_stub` to load-test payments offline.
+    'BASE_URL': config('SSLCOMMERZ_BASE_URL', default=''),
+    'CONNECT_TIMEOUT': config('SSLCOMMERZ_CONNECT_TIMEOUT', default=3.05, cast=float),
+    'READ_TIMEOUT': config('SSLCOMMERZ_READ_TIMEOUT', default=10, cast=float),
+    'RETRIES': config('SSLCOMMERZ_RETRIES', default=2, cast=int),
+    'POOL_SIZE': config('SSLCOMMERZ_POOL_SIZE', default=20, cast=int),
+}
 
 BACKEND_URL = config("BACKEND_URL")
 FRONTEND_URL = config("FRONTEND_URL")
\ No newline at end of file
@@ -17,31 +17,18 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 from .views import api_root_view
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from .docs import redoc_ui, swagger_ui
+from api.metrics import metrics
 from django.conf.urls.static import static
 from django.conf import settings
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Blood Bank API",
-      default_version='v1',
-      description="API Documentation for Bloodbank Poject",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="naimulh644@gmail.com"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
-
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('',api_root_view),
     path('api/v1/',include('api.urls'),name='api-root'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-   path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger/', swagger_ui, name='schema-swagger-ui'),
+   path('redoc/', redoc_ui, name='schema-redoc'),
+    path('metrics', metrics, name='metrics'),
 ]
 
 urlpatterns += static(settings.MEDIA_URL,document_root = settings.MEDIA_ROOT)
\ No newline at end of file
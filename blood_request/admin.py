@@ -1,5 +1,6 @@
 from django.contrib import admin
-from blood_request.models import BloodRequest
+from blood_request.models import BloodRequest, DonorNotification
 # Register your models here.
 
 admin.site.register(BloodRequest)
+admin.site.register(DonorNotification)
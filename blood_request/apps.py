@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BloodRequestConfig(AppConfig):
     name = 'blood_request'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,109 @@
+"""
+SSLCommerz client. One keep-alive connection pool is shared per process,
+every call has a bounded connect/read timeout, and failed connections are
+retried with backoff.
+"""
+import threading
+from functools import lru_cache
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SESSION_PATH = '/gwprocess/v4/api.php'
+VALIDATION_PATH = '/validator/api/validationserverAPI.php'
+TRANSACTION_QUERY_PATH = '/validator/api/merchantTransIDvalidationAPI.php'
+
+
+class GatewayError(Exception):
+    """The gateway could not be reached or did not answer with JSON."""
+
+
+class SSLCommerzGateway:
+    def __init__(self, store_id, store_pass, base_url, connect_timeout=3.05, read_timeout=10,
+                 retries=2, pool_size=20):
+        self.store_id = store_id
+        self.store_pass = store_pass
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+
+        # POSTs are only retried when the connection failed before anything
+        # was sent; GETs are also retried on read errors and 5xx answers.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.local = threading.local()
+
+    @property
+    def session(self):
+        # requests does not promise a Session is thread-safe (it carries
+        # cookies and other per-call state), so every thread gets its own.
+        # They all mount the same adapter, whose urllib3 pool is, so the
+        # keep-alive connections are still shared.
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+            self.local.session = session
+        return session
+
+    def call(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+            return response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise GatewayError(str(exc)) from exc
+
+    def credentials(self):
+        return {'store_id': self.store_id, 'store_passwd': self.store_pass}
+
+    def create_session(self, post_body):
+        return self.call('POST', SESSION_PATH, data={**post_body, **self.credentials()})
+
+    def validate(self, val_id):
+        params = {'val_id': val_id, 'format': 'json', **self.credentials()}
+        return self.call('GET', VALIDATION_PATH, params=params)
+
+    def query_transaction(self, tran_id):
+        params = {'tran_id': tran_id, 'format': 'json', **self.credentials()}
+        return self.call('GET', TRANSACTION_QUERY_PATH, params=params)
+
+    async def acreate_session(self, post_body):
+        """
+        create_session for async callers. The HTTP call is still the blocking
+        requests one: it runs on a worker thread (thread_sensitive=False, so
+        off the thread that serializes ORM calls) while the event loop serves
+        other requests. Each in-flight call holds a thread until the gateway
+        answers or times out. That is deliberate: it keeps one client, one
+        connection pool and one retry policy for both paths, and an async
+        client would have to be bound to each event loop.
+        """
+        return await sync_to_async(self.create_session, thread_sensitive=False)(post_body)
+
+
+@lru_cache(maxsize=1)
+def get_gateway():
+    config = settings.SSLCOMMERZ
+    base_url = config['BASE_URL'] or (
+        'https://sandbox.sslcommerz.com' if config['IS_SANDBOX'] else 'https://securepay.sslcommerz.com'
+    )
+    return SSLCommerzGateway(
+        store_id=config['STORE_ID'],
+        store_pass=config['STORE_PASS'],
+        base_url=base_url,
+        connect_timeout=config['CONNECT_TIMEOUT'],
+        read_timeout=config['READ_TIMEOUT'],
+        retries=config['RETRIES'],
+        pool_size=config['POOL_SIZE'],
+    )
@@ -0,0 +1,92 @@
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from blood_request.gateway import SESSION_PATH, TRANSACTION_QUERY_PATH, VALIDATION_PATH
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+
+    def respond(self, payload, code=200):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate(self):
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self.respond({'status': 'FAILED', 'failedreason': 'Stub failure'}, code=503)
+            return False
+        return True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        data = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        if urlparse(self.path).path != SESSION_PATH:
+            return self.respond({'status': 'FAILED', 'failedreason': 'Unknown endpoint'}, code=404)
+        if not self.simulate():
+            return
+        session = uuid.uuid4().hex
+        self.respond({
+            'status': 'SUCCESS',
+            'sessionkey': session,
+            'GatewayPageURL': f"http://{self.headers.get('Host')}/pay/{session}?tran_id={data.get('tran_id', '')}",
+        })
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path not in (VALIDATION_PATH, TRANSACTION_QUERY_PATH):
+            return self.respond({'status': 'FAILED', 'failedreason': 'Unknown endpoint'}, code=404)
+        if not self.simulate():
+            return
+        if url.path == VALIDATION_PATH:
+            return self.respond({'status': 'VALID', 'val_id': params.get('val_id'), 'tran_id': params.get('tran_id', '')})
+        self.respond({
+            'APIConnect': 'DONE',
+            'no_of_trans_found': 1,
+            'element': [{'tran_id': params.get('tran_id'), 'status': 'VALID'}],
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the SSLCommerz API. Point SSLCOMMERZ_BASE_URL at it "
+        "to load-test payment initiation without calling the real gateway."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        parser.add_argument('--latency', type=float, default=0.2, help="Seconds to wait before every answer.")
+        parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of calls answered with a 503.")
+
+    def handle(self, *args, **options):
+        handler = type('Handler', (StubHandler,), {
+            'latency': options['latency'],
+            'fail_rate': options['fail_rate'],
+        })
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Gateway stub listening on http://{options['host']}:{options['port']} "
+            f"(latency {options['latency']}s, fail rate {options['fail_rate']:.0%})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models import Case, Count, F, OuterRef, Prefetch, Subquery, Value, When
+from django.db.models.functions import Coalesce, Now
+
+
+class BloodRequestQuerySet(models.QuerySet):
+    def with_read_data(self):
+        """
+        Loads everything BloodRequestSerializer reads in a fixed number of
+        queries: the recipient through a join and the donors (id + email
+        only) in a single prefetch. current_donors_count and
+        bags_still_needed come from the denormalized donors_count column;
+        nothing counts the join table on the read path.
+        """
+        donors = get_user_model().objects.only('id', 'email')
+        return self.select_related('recipient').prefetch_related(Prefetch('donors', queryset=donors))
+
+    def sync_donors_count(self):
+        """
+        Recomputes donors_count from the join table, then is_fulfilled from
+        it, for writes that bypass accept/withdraw.
+        """
+        through = self.model.donors.through
+        count = through.objects.filter(bloodrequest_id=OuterRef('pk')).order_by().values(
+            'bloodrequest_id'
+        ).annotate(total=Count('id')).values('total')
+        self.update(donors_count=Coalesce(Subquery(count), 0), updated_at=Now())
+        self.update(is_fulfilled=Case(
+            When(donors_count__gte=F('bags_needed'), then=Value(True)),
+            default=Value(False),
+        ))
+
+
+class DonorNotificationQuerySet(models.QuerySet):
+    def saturated_donors(self, since, limit):
+        """
+        Ids of donors who got at least `limit` notifications since `since`,
+        as a subquery; served by the donor/created_at index.
+        """
+        return self.filter(created_at__gte=since).order_by().values('donor_id').annotate(
+            total=Count('id')
+        ).filter(total__gte=limit).values('donor_id')
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_donors_count(apps, schema_editor):
+    BloodRequest = apps.get_model('blood_request', 'BloodRequest')
+    through = BloodRequest.donors.through
+    count = through.objects.filter(bloodrequest_id=OuterRef('pk')).order_by().values(
+        'bloodrequest_id'
+    ).annotate(total=Count('id')).values('total')
+    BloodRequest.objects.update(donors_count=Coalesce(Subquery(count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blood_request', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloodrequest',
+            name='donors_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_donors_count, migrations.RunPython.noop),
+    ]
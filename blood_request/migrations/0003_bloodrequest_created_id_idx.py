@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blood_request', '0002_bloodrequest_donors_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bloodrequest',
+            index=models.Index(fields=['created_at', 'id'], name='request_created_id_idx'),
+        ),
+    ]
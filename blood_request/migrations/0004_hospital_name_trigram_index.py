@@ -0,0 +1,31 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    # GIN/pg_trgm only exist on PostgreSQL; other backends use the in-process
+    # n-gram fallback in api.search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS request_hospital_trgm_idx '
+        'ON blood_request_bloodrequest USING gin (hospital_name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS request_hospital_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blood_request', '0003_bloodrequest_created_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from blood_request.managers import BloodRequestQuerySet, DonorNotificationQuerySet
+from api.cache import REQUESTS, invalidate_responses
+from api.geo import LATITUDE_VALIDATORS, LONGITUDE_VALIDATORS, apply_location
 
 class BloodRequest(models.Model):
     recipient = models.ForeignKey(
@@ -18,9 +21,66 @@ class BloodRequest(models.Model):
     blood_group = models.CharField(max_length=3)
     bags_needed = models.PositiveIntegerField(default=1) 
     hospital_name = models.CharField(max_length=255, default="Unknown Hospital")
+    # Hospital location; resolved from hospital_name through the bundled
+    # gazetteer when no coordinates are given.
+    district = models.CharField(max_length=50, blank=True, null=True)
+    upazila = models.CharField(max_length=50, blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True, validators=LATITUDE_VALIDATORS)
+    longitude = models.FloatField(blank=True, null=True, validators=LONGITUDE_VALIDATORS)
+    geohash = models.CharField(max_length=12, blank=True, null=True, db_index=True)
     donation_date = models.DateField(default=timezone.now)
+    # Denormalized len(donors); kept in step by accept/withdraw under a row
+    # lock and by the m2m_changed handler for every other path.
+    donors_count = models.PositiveIntegerField(default=0)
     is_fulfilled = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Conditional GETs compare against this; writes through update() and
+    # save(update_fields=...) have to set it themselves.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BloodRequestQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the request feed walks (created_at, id).
+            models.Index(fields=['created_at', 'id'], name='request_created_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        apply_location(self, self.hospital_name)
+        super().save(*args, **kwargs)
+        invalidate_responses(REQUESTS)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_responses(REQUESTS)
+        return result
+
+    def __str__(self):
+        return f"{self.blood_group} for {self.recipient.email}"
+
+
+class DonorNotification(models.Model):
+    """
+    One donor told about one blood request. Rows are written in batches by
+    blood_request.notifications when the request is created; sent_at is set
+    once the email went out.
+    """
+    blood_request = models.ForeignKey(BloodRequest, on_delete=models.CASCADE, related_name='notifications')
+    donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='request_notifications')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DonorNotificationQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blood_request', 'donor'], name='notification_request_donor_uniq'),
+        ]
+        indexes = [
+            # The per-donor rate limit counts a donor's recent notifications.
+            models.Index(fields=['donor', 'created_at'], name='notification_donor_created_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.blood_group} for {self.recipient.email}"
\ No newline at end of file
+        return f"Request #{self.blood_request_id} -> user #{self.donor_id}"
@@ -0,0 +1,144 @@
+"""
+Tells eligible, compatible donors about a new blood request. Creating a
+request only enqueues a `notify_donors` job. That job resolves the
+recipients in one query, writes their DonorNotification rows in chunks
+of NOTIFY_CHUNK_SIZE and enqueues one `deliver_notifications` job per
+chunk, each NOTIFY_CHUNK_INTERVAL after the previous one, so a request
+with thousands of recipients reaches the mail server at a steady rate.
+
+A donor gets at most NOTIFY_DONOR_LIMIT notifications per
+NOTIFY_DONOR_WINDOW; the rest of the requests in that window skip them.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from blood_request.models import BloodRequest, DonorNotification
+from donors.compatibility import compatible_donor_groups
+from donors.models import DonorProfile
+from jobs.email import JOBS_EMAIL_BACKEND
+from jobs.worker import Heartbeat, enqueue, enqueue_many
+
+NOTIFY_CHUNK_SIZE = getattr(settings, 'NOTIFY_CHUNK_SIZE', 100)
+NOTIFY_CHUNK_INTERVAL = getattr(settings, 'NOTIFY_CHUNK_INTERVAL', timedelta(seconds=2))
+NOTIFY_DONOR_LIMIT = getattr(settings, 'NOTIFY_DONOR_LIMIT', 3)
+NOTIFY_DONOR_WINDOW = getattr(settings, 'NOTIFY_DONOR_WINDOW', timedelta(days=1))
+
+
+def notify_compatible_donors(blood_requests):
+    """Enqueues the fan-out for newly created requests: one INSERT, whatever the recipient count."""
+    enqueue_many('notify_donors', [{'blood_request': blood_request.pk} for blood_request in blood_requests])
+
+
+def recipients(blood_request, now=None):
+    """
+    User ids of the donors to notify about `blood_request`: eligible, of a
+    compatible group, in the request's district when it has one, and not
+    rate-limited or already notified. The exact group comes first, universal
+    O- last. One query; the group/eligibility filter is a range scan on
+    donor_group_eligible_idx.
+    """
+    now = now or timezone.now()
+    groups = compatible_donor_groups(blood_request.blood_group)
+    queryset = (
+        DonorProfile.objects.eligible(now.date())
+        .filter(blood_group__in=groups, user__is_active=True)
+        .exclude(user_id=blood_request.recipient_id)
+        .exclude(user_id__in=blood_request.donors.values('id'))
+        .exclude(user_id__in=DonorNotification.objects.filter(blood_request=blood_request).values('donor_id'))
+        .exclude(user_id__in=DonorNotification.objects.saturated_donors(now - NOTIFY_DONOR_WINDOW, NOTIFY_DONOR_LIMIT))
+    )
+    if blood_request.district:
+        queryset = queryset.filter(user__district=blood_request.district)
+    rank = Case(
+        *[When(blood_group=group, then=Value(index)) for index, group in enumerate(groups)],
+        output_field=IntegerField(),
+    )
+    return queryset.order_by(rank, 'user_id').values_list('user_id', flat=True)
+
+
+def fan_out(blood_request_id):
+    """
+    Writes the notifications for one request and schedules their delivery.
+    Each chunk is committed together with its delivery job; recipients()
+    skips donors already notified, so a retry picks up where a failed run
+    stopped. Returns the number of notifications written.
+    """
+    blood_request = BloodRequest.objects.filter(pk=blood_request_id, is_fulfilled=False).first()
+    if blood_request is None:
+        return 0
+
+    now = timezone.now()
+    donor_ids = list(recipients(blood_request, now))
+    for index, start in enumerate(range(0, len(donor_ids), NOTIFY_CHUNK_SIZE)):
+        chunk = [DonorNotification(blood_request=blood_request, donor_id=donor_id) for donor_id in donor_ids[start:start + NOTIFY_CHUNK_SIZE]]
+        with transaction.atomic():
+            chunk = DonorNotification.objects.bulk_create(chunk)
+            enqueue(
+                'deliver_notifications',
+                {'notifications': [notification.pk for notification in chunk]},
+                run_at=now + index * NOTIFY_CHUNK_INTERVAL,
+            )
+    return len(donor_ids)
+
+
+def notify_donors(jobs):
+    """Task handler for `notify_donors` jobs."""
+    errors = {}
+    for job in jobs:
+        try:
+            fan_out(job.payload['blood_request'])
+        except Exception as exc:
+            errors[job.pk] = f"{type(exc).__name__}: {exc}"
+    return errors
+
+
+def build_message(notification, connection):
+    blood_request = notification.blood_request
+    place = ", ".join(part for part in (blood_request.hospital_name, blood_request.district) if part)
+    return EmailMessage(
+        subject=f"{blood_request.blood_group} blood needed at {blood_request.hospital_name}",
+        body=(
+            f"Hi {notification.donor.first_name or 'there'},\n\n"
+            f"Someone needs {blood_request.bags_needed} bag(s) of {blood_request.blood_group} blood "
+            f"at {place} on {blood_request.donation_date:%d %B %Y}. Your blood group can help.\n\n"
+            f"If you are able to donate, accept the request here: {settings.FRONTEND_URL}\n"
+        ),
+        to=[notification.donor.email],
+        connection=connection,
+    )
+
+
+def deliver_notifications(jobs):
+    """
+    Task handler for `deliver_notifications` jobs (one per batch, see
+    jobs.worker.TASK_BATCH_LIMITS): emails every unsent notification of
+    the batch over one connection. Requests fulfilled in the meantime are
+    skipped. Each notification is marked sent as soon as its email is
+    out, so a retry or a requeued job never mails anyone twice.
+    """
+    ids = {job.pk: job.payload['notifications'] for job in jobs}
+    notifications = DonorNotification.objects.filter(
+        pk__in=[pk for chunk in ids.values() for pk in chunk],
+        sent_at__isnull=True,
+        blood_request__is_fulfilled=False,
+    ).select_related('blood_request', 'donor').in_bulk()
+
+    errors = {}
+    heartbeat = Heartbeat(jobs)
+    connection = get_connection(JOBS_EMAIL_BACKEND)
+    with connection:
+        for job_id, chunk in ids.items():
+            try:
+                for pk in chunk:
+                    if pk in notifications:
+                        connection.send_messages([build_message(notifications[pk], connection)])
+                        DonorNotification.objects.filter(pk=pk).update(sent_at=timezone.now())
+                        heartbeat()
+            except Exception as exc:
+                errors[job_id] = f"{type(exc).__name__}: {exc}"
+    return errors
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import BloodRequest
+from api.geo import validate_coordinates
 
 class BloodRequestSerializer(serializers.ModelSerializer):
     recipient_email = serializers.EmailField(source='recipient.email', read_only=True)
@@ -11,8 +12,9 @@ class BloodRequestSerializer(serializers.ModelSerializer):
         source='donors'
     )
     
-    current_donors_count = serializers.IntegerField(source='donors.count', read_only=True)
+    current_donors_count = serializers.IntegerField(source='donors_count', read_only=True)
     bags_still_needed = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = BloodRequest
@@ -22,14 +24,30 @@ class BloodRequestSerializer(serializers.ModelSerializer):
             'donors', 'donor_emails', 
             'blood_group', 'bags_needed', 
             'current_donors_count', 'bags_still_needed',
-            'hospital_name', 'donation_date','is_fulfilled', 'created_at'
+            'hospital_name', 'district', 'upazila', 'latitude', 'longitude', 'distance_km',
+            'donation_date','is_fulfilled', 'created_at'
         ]
         read_only_fields = ['recipient', 'donors', 'is_fulfilled']
 
     def get_bags_still_needed(self, obj):
-        needed = obj.bags_needed - obj.donors.count()
+        needed = obj.bags_needed - obj.donors_count
         return max(0, needed)
 
+    def get_distance_km(self, obj):
+        # Only set when the list was filtered with ?near=
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+    def update(self, instance, validated_data):
+        # A new hospital or area without coordinates is geocoded again on save.
+        moved = any(field in validated_data for field in ['hospital_name', 'district', 'upazila'])
+        if moved and 'latitude' not in validated_data and 'longitude' not in validated_data:
+            validated_data.update(latitude=None, longitude=None)
+        return super().update(instance, validated_data)
+
+    def validate(self, attrs):
+        return validate_coordinates(attrs)
+
     def validate_blood_group(self, value):
         valid_groups = ['O+', 'O-', 'A+', 'A-', 'B+', 'B-', 'AB+', 'AB-']
         if value not in valid_groups:
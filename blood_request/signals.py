@@ -0,0 +1,29 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+from api.cache import REQUESTS, invalidate_responses
+from .models import BloodRequest
+
+
+@receiver(m2m_changed, sender=BloodRequest.donors.through)
+def sync_donors_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps donors_count right when donors are edited outside accept/withdraw
+    (admin, shell, fixtures). accept/withdraw write the join table directly
+    and maintain the counter themselves, so they never get here.
+    """
+    if action == 'pre_clear' and reverse:
+        instance._cleared_request_ids = list(instance.donations_made.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        request_ids = [instance.pk]
+    elif action == 'post_clear':
+        request_ids = getattr(instance, '_cleared_request_ids', [])
+    else:
+        request_ids = pk_set or []
+
+    if request_ids:
+        BloodRequest.objects.filter(pk__in=request_ids).sync_donors_count()
+        invalidate_responses(REQUESTS)
@@ -1,3 +1,585 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import timedelta
+from http.server import ThreadingHTTPServer
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from blood_request.gateway import SSLCommerzGateway
+from blood_request.management.commands.run_gateway_stub import StubHandler
+from blood_request.models import BloodRequest, DonorNotification
+from blood_request.notifications import recipients
+from donors.compatibility import BLOOD_GROUPS
+from donors.models import DonationTransaction, DonorProfile
+from jobs.models import Job
+from jobs.worker import run_batch
+
+
+class BloodRequestReadPathTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.viewer = User.objects.create_user(email='viewer@example.com', password='pass12345')
+        self.recipient = User.objects.create_user(email='recipient@example.com', password='pass12345')
+        self.donors = [
+            User.objects.create_user(email=f'donor{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+
+    def make_requests(self, count, recipient=None):
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                blood_request = BloodRequest.objects.create(
+                    recipient=recipient or self.recipient,
+                    blood_group='A+',
+                    bags_needed=5,
+                    donation_date=tomorrow,
+                )
+                blood_request.donors.add(*self.donors)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_request_list_query_count_is_fixed_per_page(self):
+        self.make_requests(1)
+        small, _ = self.count_queries('/api/v1/requests/')
+
+        self.make_requests(9)
+        full, response = self.count_queries('/api/v1/requests/')
+
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(small, full)
+        # ETag aggregate, COUNT for the paginator, the page itself and the
+        # donor prefetch.
+        self.assertEqual(full, 4)
+
+    def test_my_requests_query_count_is_fixed_per_page(self):
+        self.client.force_authenticate(self.viewer)
+        self.make_requests(1, recipient=self.viewer)
+        small, _ = self.count_queries('/api/v1/my-requests/')
+
+        self.make_requests(9, recipient=self.viewer)
+        full, response = self.count_queries('/api/v1/my-requests/')
+
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(small, full)
+
+    def test_list_reads_the_denormalized_donors_count(self):
+        self.make_requests(1)
+        # Knock the counter out of step with the join table: the list must
+        # report the column, not count the prefetched donors.
+        BloodRequest.objects.update(donors_count=4)
+        response = self.client.get('/api/v1/requests/')
+        row = response.data['results'][0]
+
+        self.assertEqual(row['current_donors_count'], 4)
+        self.assertEqual(row['bags_still_needed'], 1)
+        self.assertEqual(row['recipient_email'], 'recipient@example.com')
+        self.assertEqual(sorted(row['donor_emails']), sorted(d.email for d in self.donors))
+
+
+class DonorCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.recipient = User.objects.create_user(email='recipient@example.com', password='pass12345')
+        self.donor = User.objects.create_user(email='donor@example.com', password='pass12345')
+        DonorProfile.objects.create(user=self.donor, blood_group='O-', age=30)
+        self.blood_request = BloodRequest.objects.create(
+            recipient=self.recipient,
+            blood_group='A+',
+            bags_needed=1,
+            donation_date=timezone.now().date() + timedelta(days=2),
+        )
+        self.client.force_authenticate(self.donor)
+
+    def test_accept_and_withdraw_keep_counter_in_step(self):
+        response = self.client.post(f'/api/v1/requests/{self.blood_request.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.blood_request.refresh_from_db()
+        self.assertEqual(self.blood_request.donors_count, 1)
+        self.assertTrue(self.blood_request.is_fulfilled)
+
+        response = self.client.post(f'/api/v1/requests/{self.blood_request.id}/withdraw/')
+        self.assertEqual(response.status_code, 200)
+        self.blood_request.refresh_from_db()
+        self.assertEqual(self.blood_request.donors_count, 0)
+        self.assertFalse(self.blood_request.is_fulfilled)
+
+    def test_direct_m2m_edits_resync_counter(self):
+        self.blood_request.donors.add(self.donor)
+        self.blood_request.refresh_from_db()
+        self.assertEqual(self.blood_request.donors_count, 1)
+
+        self.donor.donations_made.clear()
+        self.blood_request.refresh_from_db()
+        self.assertEqual(self.blood_request.donors_count, 0)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentAcceptTests(TransactionTestCase):
+    DONORS = 12
+    BAGS_NEEDED = 3
+
+    def setUp(self):
+        recipient = User.objects.create_user(email='recipient@example.com', password='pass12345')
+        self.blood_request = BloodRequest.objects.create(
+            recipient=recipient,
+            blood_group='O-',
+            bags_needed=self.BAGS_NEEDED,
+            donation_date=timezone.now().date() + timedelta(days=2),
+        )
+        self.donors = []
+        for i in range(self.DONORS):
+            donor = User.objects.create_user(email=f'donor{i}@example.com', password='pass12345')
+            DonorProfile.objects.create(user=donor, blood_group='O-', age=30)
+            self.donors.append(donor)
+
+    def test_concurrent_accepts_never_overbook(self):
+        barrier = threading.Barrier(self.DONORS)
+        statuses = []
+
+        def accept(donor):
+            client = APIClient()
+            client.force_authenticate(donor)
+            try:
+                barrier.wait()
+                response = client.post(f'/api/v1/requests/{self.blood_request.id}/accept/')
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=accept, args=(donor,)) for donor in self.donors]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.blood_request.refresh_from_db()
+        self.assertEqual(statuses.count(200), self.BAGS_NEEDED)
+        self.assertEqual(self.blood_request.donors_count, self.BAGS_NEEDED)
+        self.assertEqual(self.blood_request.donors.count(), self.BAGS_NEEDED)
+        self.assertTrue(self.blood_request.is_fulfilled)
+
+
+class PaymentGatewayTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        self.gateway = SSLCommerzGateway('store', 'pass', f'http://{host}:{port}', read_timeout=2)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='payer@example.com', password='pass12345')
+        self.client.force_authenticate(self.user)
+
+    def test_session_is_created_through_the_pooled_client(self):
+        with mock.patch('blood_request.views.get_gateway', return_value=self.gateway):
+            response = self.client.post('/api/v1/payment/initiate/', {'amount': 500})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/pay/', response.data['payment_url'])
+
+    def test_unreachable_gateway_answers_502(self):
+        dead = SSLCommerzGateway('store', 'pass', 'http://127.0.0.1:9', connect_timeout=0.5, retries=0)
+        with mock.patch('blood_request.views.get_gateway', return_value=dead):
+            response = self.client.post('/api/v1/payment/initiate/', {'amount': 500})
+
+        self.assertEqual(response.status_code, 502)
+
+    def auth(self, user=None):
+        return {'Authorization': f'JWT {AccessToken.for_user(user or self.user)}'}
+
+    async def test_async_session_is_created_through_the_pooled_client(self):
+        with mock.patch('blood_request.views.get_gateway', return_value=self.gateway):
+            response = await self.async_client.post(
+                '/api/v1/payment/initiate/async/', {'amount': 500}, content_type='application/json', headers=self.auth(),
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/pay/', response.json()['payment_url'])
+        self.assertEqual(await DonationTransaction.objects.filter(user=self.user).acount(), 1)
+
+    async def test_async_checks_method_and_credentials(self):
+        url = '/api/v1/payment/initiate/async/'
+        self.assertEqual((await self.async_client.get(url, headers=self.auth())).status_code, 405)
+        self.assertEqual((await self.async_client.post(url, {'amount': 500})).status_code, 401)
+        response = await self.async_client.post(url, {'amount': 500}, headers={'Authorization': 'JWT not-a-token'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_async_rejects_bad_bodies(self):
+        url = '/api/v1/payment/initiate/async/'
+        response = await self.async_client.post(url, '{not json', content_type='application/json', headers=self.auth())
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post(url, {}, content_type='application/json', headers=self.auth())
+        self.assertEqual(response.json(), {'error': 'Amount is required'})
+        self.assertEqual(await DonationTransaction.objects.acount(), 0)
+
+    async def test_async_unreachable_gateway_answers_502(self):
+        dead = SSLCommerzGateway('store', 'pass', 'http://127.0.0.1:9', connect_timeout=0.5, retries=0)
+        with mock.patch('blood_request.views.get_gateway', return_value=dead):
+            response = await self.async_client.post(
+                '/api/v1/payment/initiate/async/', {'amount': 500}, content_type='application/json', headers=self.auth(),
+            )
+        self.assertEqual(response.status_code, 502)
+
+    def test_each_thread_gets_its_own_session_over_one_pool(self):
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(self.gateway.session))
+        thread.start()
+        thread.join()
+
+        self.assertIs(self.gateway.session, self.gateway.session)
+        self.assertIsNot(sessions[0], self.gateway.session)
+        self.assertIs(sessions[0].get_adapter('http://'), self.gateway.session.get_adapter('http://'))
+
+
+class PaymentCallbackTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='payer@example.com', password='pass12345')
+        self.donation = DonationTransaction.objects.create(user=self.user, amount=500)
+
+    def test_repeated_callbacks_settle_once_with_one_statement(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.post('/api/v1/payment/success/', {'tran_id': f'don_{self.donation.id}'})
+        self.assertEqual(len(first), 1)
+        self.client.post('/api/v1/payment/fail/', {'tran_id': f'don_{self.donation.id}'})
+
+        self.donation.refresh_from_db()
+        self.assertEqual(self.donation.status, DonationTransaction.SUCCESS)
+
+    def test_missing_or_malformed_tran_id_just_redirects(self):
+        for data in ({}, {'tran_id': 'garbage'}, {'tran_id': 'don_'}):
+            response = self.client.post('/api/v1/payment/fail/', data)
+            self.assertEqual(response.status_code, 302)
+        self.donation.refresh_from_db()
+        self.assertEqual(self.donation.status, DonationTransaction.PENDING)
+
+    def test_reconcile_settles_only_stale_pending_rows(self):
+        fresh = DonationTransaction.objects.create(user=self.user, amount=100)
+        DonationTransaction.objects.filter(pk=self.donation.pk).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        gateway = SSLCommerzGateway('store', 'pass', f'http://{host}:{port}')
+
+        with mock.patch('donors.management.commands.reconcile_transactions.get_gateway', return_value=gateway):
+            call_command('reconcile_transactions', older_than=30, stdout=StringIO())
+
+        self.donation.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(self.donation.status, DonationTransaction.SUCCESS)
+        self.assertEqual(fresh.status, DonationTransaction.PENDING)
+
+
+class PaymentHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='payer@example.com', password='pass12345')
+        self.staff = User.objects.create_user(email='finance@example.com', password='pass12345', is_staff=True)
+        for amount in range(1, 16):
+            DonationTransaction.objects.create(user=self.user, amount=amount)
+        DonationTransaction.objects.filter(amount__lte=5).update(status=DonationTransaction.SUCCESS)
+
+    def test_history_pages_through_every_transaction(self):
+        self.client.force_authenticate(self.user)
+        amounts = []
+        url = '/api/v1/payment/history/'
+        while url:
+            data = self.client.get(url).data
+            amounts.extend(row['amount'] for row in data['results'])
+            url = data['next']
+
+        self.assertEqual(amounts, [f'{amount}.00' for amount in range(15, 0, -1)])
+
+    def test_export_is_staff_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/v1/payment/export/').status_code, 403)
+
+    def test_export_streams_filtered_rows(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/v1/payment/export/?status=success')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,tran_id,email,amount,status,created_at')
+        self.assertEqual(len(lines), 6)
+
+        today = timezone.localdate()
+        response = self.client.get(f'/api/v1/payment/export/?output=ndjson&created_after={today}&created_before={today}')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(rows[0]['email'], 'payer@example.com')
+
+
+class BatchCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.hospital = User.objects.create_user(email='hospital@example.com', password='pass12345')
+        self.client.force_authenticate(self.hospital)
+        self.date = str(timezone.now().date() + timedelta(days=3))
+
+    def items(self, count):
+        groups = ['O+', 'O-', 'A+', 'A-', 'B+', 'B-', 'AB+', 'AB-']
+        return [
+            {'blood_group': groups[i % 8], 'bags_needed': 2, 'hospital_name': 'Dhaka Medical College', 'donation_date': self.date}
+            for i in range(count)
+        ]
+
+    def test_batch_inserts_with_a_constant_number_of_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/v1/requests/batch/', self.items(2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post('/api/v1/requests/batch/', self.items(40), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 40)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(BloodRequest.objects.filter(recipient=self.hospital, district='Dhaka').count(), 42)
+
+    def test_invalid_items_are_reported_by_index(self):
+        items = self.items(3)
+        items[1]['blood_group'] = 'C+'
+        response = self.client.post('/api/v1/requests/batch/', {'requests': items}, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created', 'error', 'created'])
+        self.assertIn('blood_group', response.data['results'][1]['errors'])
+        self.assertEqual(BloodRequest.objects.count(), 2)
+
+    def test_atomic_batch_creates_nothing_on_error(self):
+        items = self.items(3)
+        del items[2]['blood_group']
+        response = self.client.post('/api/v1/requests/batch/?atomic=true', items, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'][0]['index'], 2)
+        self.assertFalse(BloodRequest.objects.exists())
+
+    def test_coordinates_are_range_checked_and_paired(self):
+        item = self.items(1)[0]
+        for coordinates, field in [
+            ({'latitude': 91, 'longitude': 90}, 'latitude'),
+            ({'latitude': 23.8, 'longitude': -181}, 'longitude'),
+            ({'latitude': 23.8}, 'longitude'),
+        ]:
+            response = self.client.post('/api/v1/requests/', {**item, **coordinates}, format='json')
+            self.assertEqual(response.status_code, 400, coordinates)
+            self.assertIn(field, response.data)
+
+        response = self.client.post('/api/v1/requests/', {**item, 'latitude': 23.8, 'longitude': 90.4}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+
+class DonorNotificationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.hospital = User.objects.create_user(email='hospital@example.com', password='pass12345')
+        self.client.force_authenticate(self.hospital)
+        self.date = str(timezone.now().date() + timedelta(days=2))
+
+    def donor(self, name, blood_group, district='Dhaka', last_donation_date=None):
+        user = User.objects.create_user(email=f'{name}@example.com', password='pass12345', district=district)
+        DonorProfile.objects.create(user=user, blood_group=blood_group, age=30, last_donation_date=last_donation_date)
+        return user
+
+    def create_request(self, blood_group='A+'):
+        response = self.client.post('/api/v1/requests/', {
+            'blood_group': blood_group, 'bags_needed': 2, 'hospital_name': 'Dhaka Medical College',
+            'district': 'Dhaka', 'donation_date': self.date,
+        })
+        self.assertEqual(response.status_code, 201)
+        return BloodRequest.objects.get(pk=response.data['id'])
+
+    def run_jobs(self):
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+    def test_create_fans_out_to_eligible_compatible_donors(self):
+        exact, universal = self.donor('exact', 'A+'), self.donor('universal', 'O-')
+        self.donor('incompatible', 'B+')
+        self.donor('elsewhere', 'A+', district='Sylhet')
+        self.donor('resting', 'A+', last_donation_date=timezone.now().date() - timedelta(days=10))
+
+        blood_request = self.create_request()
+        self.assertEqual(DonorNotification.objects.count(), 0)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Job.objects.filter(task='notify_donors').count(), 1)
+
+        self.run_jobs()
+        notifications = DonorNotification.objects.filter(blood_request=blood_request)
+        self.assertEqual({n.donor_id for n in notifications}, {exact.id, universal.id})
+        self.assertTrue(all(n.sent_at for n in notifications))
+        self.assertEqual([message.to for message in mail.outbox], [[exact.email], [universal.email]])
+        self.assertIn('A+ blood needed', mail.outbox[0].subject)
+
+    def test_recipients_are_resolved_in_one_query(self):
+        for index in range(5):
+            self.donor(f'donor{index}', 'O-')
+        blood_request = self.create_request()
+        with CaptureQueriesContext(connection) as ctx:
+            donor_ids = list(recipients(blood_request))
+        self.assertEqual(len(donor_ids), 5)
+        self.assertEqual(len(ctx), 1)
+
+    @mock.patch('blood_request.notifications.NOTIFY_CHUNK_SIZE', 2)
+    def test_delivery_is_split_into_staggered_chunks(self):
+        for index in range(5):
+            self.donor(f'donor{index}', 'A+')
+        self.create_request()
+        self.run_jobs()
+
+        chunks = list(Job.objects.filter(task='deliver_notifications').order_by('run_at'))
+        self.assertEqual([len(job.payload['notifications']) for job in chunks], [2, 2, 1])
+        self.assertLess(chunks[0].run_at, chunks[1].run_at)
+        # Only the first chunk was due; the rest wait their turn.
+        self.assertEqual(len(mail.outbox), 2)
+        Job.objects.filter(status=Job.QUEUED).update(run_at=timezone.now())
+        self.run_jobs()
+        self.assertEqual(len(mail.outbox), 5)
+
+    @mock.patch('blood_request.notifications.NOTIFY_CHUNK_SIZE', 2)
+    @mock.patch('blood_request.notifications.NOTIFY_CHUNK_INTERVAL', timedelta(0))
+    def test_a_batch_delivers_one_chunk_even_when_behind(self):
+        for index in range(5):
+            self.donor(f'donor{index}', 'A+')
+        self.create_request()
+        run_batch('test')
+
+        self.assertEqual(run_batch('test'), (1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(Job.objects.filter(task='deliver_notifications', status=Job.QUEUED).count(), 2)
+
+    def test_a_failed_delivery_does_not_resend_what_went_out(self):
+        for index in range(3):
+            self.donor(f'donor{index}', 'A+')
+        self.create_request()
+        run_batch('test')
+
+        sent = []
+
+        def flaky_send(messages):
+            if len(sent) == 1:
+                raise SMTPException('451 try later')
+            sent.extend(messages)
+            return len(messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=flaky_send):
+            self.assertEqual(run_batch('test'), (0, 1))
+        self.assertEqual(DonorNotification.objects.filter(sent_at__isnull=False).count(), 1)
+
+        Job.objects.filter(status=Job.QUEUED).update(run_at=timezone.now())
+        self.assertEqual(run_batch('test'), (1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted([*sent[0].to, *(to for message in mail.outbox for to in message.to)]),
+            [f'donor{index}@example.com' for index in range(3)],
+        )
+
+    @mock.patch('blood_request.notifications.NOTIFY_DONOR_LIMIT', 2)
+    def test_donors_are_rate_limited(self):
+        donor = self.donor('busy', 'O-')
+        for _ in range(3):
+            self.create_request()
+        self.run_jobs()
+        self.assertEqual(DonorNotification.objects.filter(donor=donor).count(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class CandidateDonorTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.recipient = User.objects.create_user(email='recipient@example.com', password=None)
+        self.client.force_authenticate(self.recipient)
+        self.today = timezone.now().date()
+
+    def donor(self, name, blood_group, days_since_donation=None):
+        user = User.objects.create_user(email=f'{name}@example.com', password=None)
+        last = self.today - timedelta(days=days_since_donation) if days_since_donation is not None else None
+        return DonorProfile.objects.create(user=user, blood_group=blood_group, age=30, last_donation_date=last)
+
+    def request_for(self, blood_group, bags_needed=1):
+        return BloodRequest.objects.create(
+            recipient=self.recipient, blood_group=blood_group, bags_needed=bags_needed, donation_date=self.today,
+        )
+
+    def candidates(self, blood_request, page=1):
+        response = self.client.get(f'/api/v1/requests/{blood_request.id}/candidates/?page={page}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_exact_group_first_then_longest_rested(self):
+        rested = self.donor('rested', 'A+', days_since_donation=400)
+        universal = self.donor('universal', 'O-', days_since_donation=100)
+        first_timer = self.donor('first-timer', 'A+')
+        recently_eligible = self.donor('recently-eligible', 'A+', days_since_donation=100)
+        o_positive = self.donor('o-positive', 'O+', days_since_donation=400)
+        a_negative = self.donor('a-negative', 'A-')
+        self.donor('resting', 'A+', days_since_donation=10)
+        self.donor('incompatible', 'B+')
+        DonorProfile.objects.create(user=self.recipient, blood_group='A+', age=40)
+        blood_request = self.request_for('A+')
+
+        data = self.candidates(blood_request)
+        self.assertEqual(
+            [row['id'] for row in data['results']],
+            # The compatible groups share one tier, ordered across groups.
+            [first_timer.id, rested.id, recently_eligible.id, a_negative.id, o_positive.id, universal.id],
+        )
+        self.assertEqual([row['exact_match'] for row in data['results']], [True] * 3 + [False] * 3)
+
+    def test_donors_already_on_the_request_are_left_out(self):
+        donor = self.donor('accepted', 'A+')
+        blood_request = self.request_for('A+')
+        self.assertEqual(self.candidates(blood_request)['count'], 1)
+        blood_request.donors.add(donor.user)
+        self.assertEqual(self.candidates(blood_request)['count'], 0)
+
+    def test_pages_run_across_group_boundaries(self):
+        exact = [self.donor(f'exact{index}', 'B-') for index in range(12)]
+        universal = [self.donor(f'universal{index}', 'O-') for index in range(3)]
+        blood_request = self.request_for('B-')
+
+        first, second = self.candidates(blood_request), self.candidates(blood_request, page=2)
+        self.assertEqual(first['count'], 15)
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            [donor.id for donor in exact + universal],
+        )
+        self.assertEqual([row['blood_group'] for row in second['results']], ['B-', 'B-', 'O-', 'O-', 'O-'])
+
+    def test_accept_and_candidates_agree_on_compatibility(self):
+        for recipient_group in BLOOD_GROUPS:
+            with self.subTest(recipient_group=recipient_group):
+                DonorProfile.objects.all().delete()
+                blood_request = self.request_for(recipient_group, bags_needed=len(BLOOD_GROUPS))
+                donors = {group: self.donor(f'{recipient_group}-{group}', group) for group in BLOOD_GROUPS}
+                listed = {row['id'] for row in self.candidates(blood_request)['results']}
+
+                for group, donor in donors.items():
+                    client = APIClient()
+                    client.force_authenticate(donor.user)
+                    response = client.post(f'/api/v1/requests/{blood_request.id}/accept/')
+                    self.assertEqual(response.status_code == 200, donor.id in listed, (group, response.data))
+                    if response.status_code != 200:
+                        self.assertIn('mismatch', response.data['error'])
 
-# Create your tests here.
@@ -1,42 +1,90 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly,AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly,AllowAny
 from .models import BloodRequest
 from .serializers import BloodRequestSerializer
 from .permissions import IsRecipientOrAdmin
-from rest_framework.exceptions import NotAuthenticated
+from rest_framework.exceptions import NotAuthenticated, ValidationError
 from django.utils import timezone
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from api.pagination import DefaultPagination
+from api.pagination import DefaultPagination, RequestPagination, TransactionCursorPagination
+from api.search import TrigramSearchFilter
+from api.geo import NearFilter, apply_location
+from api.cache import REQUESTS, CachedListMixin, invalidate_responses
+from api.conditional import ConditionalGetMixin
 from rest_framework.decorators import api_view,permission_classes
-from sslcommerz_lib import SSLCOMMERZ 
-from donors.models import DonationTransaction 
+from donors.models import DonationTransaction, DonorProfile
+from donors.compatibility import BLOOD_GROUPS, can_donate
+from donors.matching import candidate_donors
+from donors.serializers import DonorCandidateSerializer
 from django.shortcuts import redirect
 from django.conf import settings as main_settings
-from django.http import HttpResponseRedirect
-
-
-class BloodRequestViewSet(viewsets.ModelViewSet):
+from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from accounts.authentication import CachedJWTAuthentication
+import csv
+import json
+from datetime import datetime, time, timedelta
+from .gateway import GatewayError, get_gateway
+from .notifications import notify_compatible_donors
+from dashboard.cache import invalidate_dashboard, invalidate_for_request
+
+
+# Upper bound for POST /requests/batch/.
+MAX_BATCH_SIZE = 500
+
+
+class DashboardInvalidationMixin:
+    """
+    Drops the cached dashboard snapshot of everyone a request write touches.
+    """
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_for_request(serializer.instance)
+
+    def perform_destroy(self, instance):
+        invalidate_for_request(instance)
+        super().perform_destroy(instance)
+
+
+class BloodRequestViewSet(CachedListMixin, ConditionalGetMixin, DashboardInvalidationMixin, viewsets.ModelViewSet):
     serializer_class = BloodRequestSerializer
-    queryset = BloodRequest.objects.all()
-    pagination_class = DefaultPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['blood_group']
+    cache_namespace = REQUESTS
+    queryset = BloodRequest.objects.with_read_data()
+    pagination_class = RequestPagination
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, NearFilter, filters.OrderingFilter]
+    filterset_fields = ['blood_group', 'district']
     search_fields = ['hospital_name', 'blood_group']
+    trigram_search_fields = ['hospital_name']
+    exact_search_fields = {'blood_group': BLOOD_GROUPS}
     ordering_fields = ['created_at','donation_date','bags_needed'] 
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            # `generate_schema` introspects views without a request.
+            return queryset
         if self.request.user.is_authenticated:
             if self.action == 'list':
                 queryset = queryset.exclude(recipient=self.request.user)
                 
         return queryset
     
+    def cache_variant(self, request):
+        # Signed-in callers never see their own requests in the list, so
+        # their pages are cached separately.
+        if request.user.is_authenticated:
+            return f'user:{request.user.id}'
+        return 'public'
+
     def get_permissions(self):
-        if self.action in ['accept', 'withdraw']:
+        if self.action in ['accept', 'withdraw', 'candidates', 'batch']:
             return [IsAuthenticated()]
         if self.action in ['update', 'partial_update', 'destroy']:
             return [IsRecipientOrAdmin()]
@@ -46,58 +94,69 @@ class BloodRequestViewSet(viewsets.ModelViewSet):
         if not self.request.user.is_authenticated:
             raise NotAuthenticated("You must be logged in to create a blood request.")
         serializer.save(recipient=self.request.user)
+        invalidate_dashboard(self.request.user.id)
+        notify_compatible_donors([serializer.instance])
 
     @action(detail=True, methods=['post','get'])
     def accept(self, request, pk=None):
         blood_request = self.get_object()
         user = request.user
 
-        if timezone.now().date() > blood_request.donation_date:
-            return Response(
-                {"error": "This blood request has expired."}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if not hasattr(user, 'donor_profile'):
-            return Response(
-                {"error": "You must create a donor profile before you can donate blood , go to Dashboard and save you donor profile."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        profile = user.donor_profile
-        
-        # --- NEW CHECK: Verify Blood Group Match ---
-        if profile.blood_group != blood_request.blood_group:
-            return Response(
-                {"error": f"Blood type mismatch. This request needs {blood_request.blood_group}, but you are registered as {profile.blood_group}."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        # -------------------------------------------
-        
-        if not profile.is_available:
-            return Response(
-                {"error": "You are currently ineligible to donate. Please check your dashboard for your next available date."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    
-        if blood_request.donors.count() >= blood_request.bags_needed:
-            return Response({"error": "This request is already fully covered."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if blood_request.donors.filter(id=user.id).exists():
-            return Response({"error": "You have already accepted this request."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if blood_request.recipient == user:
-            return Response({"error": "You cannot donate to your own request."}, status=status.HTTP_400_BAD_REQUEST)
-
-        profile.is_available = False
-        profile.last_donation_date = blood_request.donation_date
-        profile.save()
+        # The checks run against a locked copy of the request (and of the
+        # donor profile), so concurrent accepts queue up instead of
+        # overbooking the request.
+        with transaction.atomic():
+            blood_request = BloodRequest.objects.select_for_update().get(pk=blood_request.pk)
+            profile = DonorProfile.objects.select_for_update().filter(user=user).first()
+
+            if timezone.now().date() > blood_request.donation_date:
+                return Response(
+                    {"error": "This blood request has expired."}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if profile is None:
+                return Response(
+                    {"error": "You must create a donor profile before you can donate blood , go to Dashboard and save you donor profile."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # --- NEW CHECK: Verify Blood Group Compatibility ---
+            if not can_donate(profile.blood_group, blood_request.blood_group):
+                return Response(
+                    {"error": f"Blood type mismatch. This request needs blood compatible with {blood_request.blood_group}, but you are registered as {profile.blood_group}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # -------------------------------------------
+
+            if not profile.is_eligible():
+                return Response(
+                    {"error": "You are currently ineligible to donate. Please check your dashboard for your next available date."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if blood_request.donors_count >= blood_request.bags_needed:
+                return Response({"error": "This request is already fully covered."}, status=status.HTTP_400_BAD_REQUEST)
+
+            membership = BloodRequest.donors.through.objects.filter(bloodrequest=blood_request, user=user)
+            if membership.exists():
+                return Response({"error": "You have already accepted this request."}, status=status.HTTP_400_BAD_REQUEST)
+
+            if blood_request.recipient_id == user.id:
+                return Response({"error": "You cannot donate to your own request."}, status=status.HTTP_400_BAD_REQUEST)
+
+            profile.is_available = False
+            profile.last_donation_date = blood_request.donation_date
+            profile.save()
 
-        blood_request.donors.add(user)
+            # Written through the join table so the counter below is the only
+            # bookkeeping (donors.add() would recount through the signal).
+            BloodRequest.donors.through.objects.create(bloodrequest=blood_request, user=user)
+            blood_request.donors_count += 1
+            blood_request.is_fulfilled = blood_request.donors_count >= blood_request.bags_needed
+            blood_request.save(update_fields=['donors_count', 'is_fulfilled', 'updated_at'])
 
-        if blood_request.donors.count() >= blood_request.bags_needed:
-            blood_request.is_fulfilled = True
-            blood_request.save()
+        invalidate_for_request(blood_request)
 
         return Response({
             "status": "Success",
@@ -105,38 +164,106 @@ class BloodRequestViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
     
     
+    @action(detail=True, methods=['get'])
+    def candidates(self, request, pk=None):
+        blood_request = self.get_object()
+        candidates = candidate_donors(blood_request)
+        context = {**self.get_serializer_context(), 'blood_group': blood_request.blood_group}
+
+        # The ranking spans two querysets, so this always pages by number.
+        paginator = DefaultPagination()
+        page = paginator.paginate_queryset(candidates, request, view=self)
+        serializer = DonorCandidateSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Creates up to MAX_BATCH_SIZE requests at once from a JSON list (or
+        {"requests": [...]}). Valid items are inserted with one bulk INSERT;
+        invalid ones are reported by index. With ?atomic=true nothing is
+        created unless every item is valid.
+        """
+        items = request.data.get('requests') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Send a non-empty list of requests."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response({"error": f"At most {MAX_BATCH_SIZE} requests per batch."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Same per-item validation ListSerializer runs, but a bad item does
+        # not discard the good ones.
+        child = self.get_serializer(data=items, many=True).child
+        valid, errors = [], {}
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, child.run_validation(item)))
+            except ValidationError as exc:
+                errors[index] = exc.detail
+
+        all_or_nothing = request.query_params.get('atomic') in ('1', 'true')
+        if errors and (all_or_nothing or not valid):
+            results = [{"index": index, "status": "error", "errors": detail} for index, detail in errors.items()]
+            return Response({"created": 0, "failed": len(errors), "results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+        # bulk_create skips save(), so the hospital is geocoded here.
+        blood_requests = []
+        for _, data in valid:
+            blood_request = BloodRequest(recipient=request.user, **data)
+            apply_location(blood_request, blood_request.hospital_name)
+            blood_requests.append(blood_request)
+        with transaction.atomic():
+            blood_requests = BloodRequest.objects.bulk_create(blood_requests)
+            notify_compatible_donors(blood_requests)
+        invalidate_dashboard(request.user.id)
+        invalidate_responses(REQUESTS)
+
+        created = BloodRequest.objects.with_read_data().in_bulk([blood_request.pk for blood_request in blood_requests])
+        results = [
+            {"index": index, "status": "created", "data": self.get_serializer(created[blood_request.pk]).data}
+            for (index, _), blood_request in zip(valid, blood_requests)
+        ]
+        results += [{"index": index, "status": "error", "errors": detail} for index, detail in errors.items()]
+        results.sort(key=lambda result: result["index"])
+
+        return Response(
+            {"created": len(valid), "failed": len(errors), "results": results},
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED,
+        )
+
     @action(detail=True, methods=['post','get'])
     def withdraw(self, request, pk=None):
         blood_request = self.get_object()
         user = request.user
 
-       
-        if not blood_request.donors.filter(id=user.id).exists():
-            return Response(
-                {"error": "You are not a registered donor for this request."}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if timezone.now().date() >= blood_request.donation_date:
-            return Response(
-                {"error": "Withdrawal period has expired. You cannot withdraw on or after the donation date."}, 
-                status=status.HTTP_403_FORBIDDEN
-            )
-
-   
-        blood_request.donors.remove(user)
-
-      
-        if blood_request.donors.count() < blood_request.bags_needed:
-            blood_request.is_fulfilled = False
-            blood_request.save()
-
-   
-        if hasattr(user, 'donor_profile'):
-            profile = user.donor_profile
-            profile.is_available = True 
-            profile.last_donation_date = None 
-            profile.save()
+        with transaction.atomic():
+            blood_request = BloodRequest.objects.select_for_update().get(pk=blood_request.pk)
+            membership = BloodRequest.donors.through.objects.filter(bloodrequest=blood_request, user=user)
+
+            if not membership.exists():
+                return Response(
+                    {"error": "You are not a registered donor for this request."}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if timezone.now().date() >= blood_request.donation_date:
+                return Response(
+                    {"error": "Withdrawal period has expired. You cannot withdraw on or after the donation date."}, 
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+            membership.delete()
+            blood_request.donors_count = max(0, blood_request.donors_count - 1)
+            blood_request.is_fulfilled = blood_request.donors_count >= blood_request.bags_needed
+            blood_request.save(update_fields=['donors_count', 'is_fulfilled', 'updated_at'])
+
+            profile = DonorProfile.objects.select_for_update().filter(user=user).first()
+            if profile is not None:
+                profile.is_available = True 
+                profile.last_donation_date = None 
+                profile.save()
+
+        invalidate_for_request(blood_request)
+        invalidate_dashboard(user.id)
 
         return Response({
             "status": "Success",
@@ -144,46 +271,29 @@ class BloodRequestViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
 
-class MyRequestsViewSet(viewsets.ModelViewSet):
+class MyRequestsViewSet(DashboardInvalidationMixin, viewsets.ModelViewSet):
     serializer_class = BloodRequestSerializer
     permission_classes = [IsAuthenticated] 
-    pagination_class = DefaultPagination
+    pagination_class = RequestPagination
 
     def get_queryset(self):
-        return BloodRequest.objects.filter(recipient=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            return BloodRequest.objects.none()
+        return BloodRequest.objects.with_read_data().filter(recipient=self.request.user)
         
     def perform_create(self, serializer):
         serializer.save(recipient=self.request.user)
+        invalidate_dashboard(self.request.user.id)
+        notify_compatible_donors([serializer.instance])
 
 
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def initiate_payment(request):
-    amount = request.data.get('amount')
-    user = request.user
-
-    if not amount:
-        return Response({"error": "Amount is required"}, status=status.HTTP_400_BAD_REQUEST)
-    
-    transaction = DonationTransaction.objects.create(
-        user=user,
-        amount=float(amount),
-        status='PENDING'
-    )
-
-    settings = { 
-        'store_id': 'bondh69a2b4734c5ba', 
-        'store_pass': 'bondh69a2b4734c5ba@ssl', 
-        'issandbox': True 
-    }
-    sslcz = SSLCOMMERZ(settings)
-    
+def build_session_body(user, amount, donation):
     post_body = {}
     post_body['total_amount'] = float(amount)
     post_body['currency'] = "BDT"
-    post_body['tran_id'] = f"don_{transaction.id}" 
+    post_body['tran_id'] = f"don_{donation.id}"
     post_body['success_url'] = f"{main_settings.BACKEND_URL}/api/v1/payment/success/"
     post_body['fail_url'] = f"{main_settings.BACKEND_URL}/api/v1/payment/fail/"
     post_body['cancel_url'] = f"{main_settings.BACKEND_URL}/api/v1/payment/cancel/"
@@ -199,57 +309,190 @@ def initiate_payment(request):
     post_body['product_name'] = "Blood Donation"
     post_body['product_category'] = "Donation"
     post_body['product_profile'] = "general"
+    return post_body
 
-    response = sslcz.createSession(post_body)
 
+def session_result(response):
+    """
+    Maps a gateway answer to (payload, status) for both initiation views.
+    """
     if response and response.get('status') == 'SUCCESS':
-        return Response({'payment_url': response['GatewayPageURL']})
-    
-    return Response({
-        "error": "Failed to create session", 
-        "details": response
-    }, status=status.HTTP_400_BAD_REQUEST)
+        return {'payment_url': response['GatewayPageURL']}, status.HTTP_200_OK
+    return {"error": "Failed to create session", "details": response}, status.HTTP_400_BAD_REQUEST
 
 
-@api_view(['GET'])
+GATEWAY_UNAVAILABLE = {"error": "The payment gateway is not responding. Please try again."}
+
+
+@api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def payment_history(request):
-    
-    transactions = DonationTransaction.objects.filter(user=request.user).order_by('-created_at')
-    
+def initiate_payment(request):
+    amount = request.data.get('amount')
+    user = request.user
+
+    if not amount:
+        return Response({"error": "Amount is required"}, status=status.HTTP_400_BAD_REQUEST)
     
-    data = []
-    for txn in transactions:
-        data.append({
-            "tran_id": str(txn.tran_id),
-            "amount": str(txn.amount),
-            "status": txn.status,
-            "created_at": txn.created_at
-        })
-        
-   
-    return Response(data)
+    donation = DonationTransaction.objects.create(
+        user=user,
+        amount=float(amount),
+        status=DonationTransaction.PENDING
+    )
 
+    try:
+        response = get_gateway().create_session(build_session_body(user, amount, donation))
+    except GatewayError:
+        return Response(GATEWAY_UNAVAILABLE, status=status.HTTP_502_BAD_GATEWAY)
+
+    payload, code = session_result(response)
+    return Response(payload, status=code)
+
+
+@csrf_exempt
+async def initiate_payment_async(request):
+    """
+    ASGI variant of initiate_payment. The gateway call runs on a worker
+    thread (see SSLCommerzGateway.acreate_session), so a slow gateway holds
+    a thread but not the event loop.
+    """
+    if request.method != 'POST':
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    try:
+        auth = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    if auth is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+    user = auth[0]
+
+    try:
+        data = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+        amount = data.get('amount')
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid request body"}, status=status.HTTP_400_BAD_REQUEST)
 
-@api_view(['GET','POST'])
-def payment_success(request):
+    if not amount:
+        return JsonResponse({"error": "Amount is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-    print("Inside success")
+    donation = await DonationTransaction.objects.acreate(
+        user=user,
+        amount=float(amount),
+        status=DonationTransaction.PENDING
+    )
 
-    tran_id = request.POST.get("tran_id") or request.GET.get("tran_id")
+    try:
+        response = await get_gateway().acreate_session(build_session_body(user, amount, donation))
+    except GatewayError:
+        return JsonResponse(GATEWAY_UNAVAILABLE, status=status.HTTP_502_BAD_GATEWAY)
 
-    print("TRAN_ID:", tran_id)
+    payload, code = session_result(response)
+    return JsonResponse(payload, status=code)
 
-    if not tran_id:
-        return HttpResponseRedirect(
-            f"{main_settings.FRONTEND_URL}/dashboard/payment/success/"
-        )
 
-    donation_id = tran_id.split('_')[1]
+HISTORY_FIELDS = ('id', 'tran_id', 'amount', 'status', 'created_at')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payment_history(request):
+    """
+    The caller's transactions, newest first, a page at a time. Follow
+    `next` to load older ones.
+    """
+    transactions = DonationTransaction.objects.filter(user=request.user).values(*HISTORY_FIELDS)
+
+    paginator = TransactionCursorPagination()
+    page = paginator.paginate_queryset(transactions, request)
+    data = [
+        {
+            "tran_id": str(txn['tran_id']),
+            "amount": str(txn['amount']),
+            "status": txn['status'],
+            "created_at": txn['created_at'],
+        }
+        for txn in page
+    ]
+    return paginator.get_paginated_response(data)
+
+
+EXPORT_COLUMNS = ('id', 'tran_id', 'user__email', 'amount', 'status', 'created_at')
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+    def write(self, value):
+        return value
+
+
+def export_rows(transactions, output):
+    rows = transactions.values_list(*EXPORT_COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if output == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(['id', 'tran_id', 'email', 'amount', 'status', 'created_at'])
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for pk, tran_id, email, amount, txn_status, created_at in rows:
+            yield json.dumps({
+                'id': pk,
+                'tran_id': str(tran_id),
+                'email': email,
+                'amount': str(amount),
+                'status': txn_status,
+                'created_at': created_at.isoformat(),
+            }) + '\n'
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def payment_export(request):
+    """
+    Streams every transaction as CSV (default) or NDJSON (?output=ndjson).
+    Filters: ?status=, ?created_after= and ?created_before= (ISO dates,
+    inclusive). Rows are read in chunks and written as they arrive, so
+    memory stays flat however many rows match.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in ('csv', 'ndjson'):
+        return Response({"error": "output must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+
+    transactions = DonationTransaction.objects.order_by('id')
+    txn_status = request.query_params.get('status')
+    if txn_status:
+        transactions = transactions.filter(status=txn_status.upper())
+    # Whole-day bounds as plain datetimes, so created_at stays index-friendly.
+    for param, lookup, offset in (('created_after', 'created_at__gte', 0), ('created_before', 'created_at__lt', 1)):
+        value = request.query_params.get(param)
+        if not value:
+            continue
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            return Response({param: "Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        bound = timezone.make_aware(datetime.combine(day + timedelta(days=offset), time.min))
+        transactions = transactions.filter(**{lookup: bound})
+
+    content_type = 'text/csv' if output == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(export_rows(transactions, output), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="transactions.{output}"'
+    return response
+
+
+def callback_tran_id(request):
+    return request.POST.get("tran_id") or request.GET.get("tran_id")
+
+
+@api_view(['GET','POST'])
+def payment_success(request):
+
+    donation_id = DonationTransaction.parse_tran_id(callback_tran_id(request))
 
-    transaction = DonationTransaction.objects.get(id=donation_id)
-    transaction.status = "SUCCESS"
-    transaction.save()
+    if donation_id is not None:
+        DonationTransaction.objects.settle(donation_id, DonationTransaction.SUCCESS)
 
     return HttpResponseRedirect(
         f"{main_settings.FRONTEND_URL}/dashboard/payment/success/"
@@ -258,12 +501,10 @@ def payment_success(request):
 @api_view(['GET','POST'])
 def payment_fail(request):
 
-    tran_id = request.data.get("tran_id")
-    donation_id = tran_id.split('_')[1]
+    donation_id = DonationTransaction.parse_tran_id(callback_tran_id(request))
 
-    transaction = DonationTransaction.objects.get(id=donation_id)
-    transaction.status = "FAILED"
-    transaction.save()
+    if donation_id is not None:
+        DonationTransaction.objects.settle(donation_id, DonationTransaction.FAILED)
 
     return HttpResponseRedirect(
         f"{main_settings.FRONTEND_URL}/dashboard/payment/fail/"
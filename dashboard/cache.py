@@ -0,0 +1,57 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def snapshot_key(user_id):
+    return f"dashboard:snapshot:{user_id}"
+
+
+def get_snapshot(user_id):
+    """
+    Returns the cached dashboard sections for a user and their digest, or
+    None. Snapshots are tied to the day they were built because the
+    active/history split moves at midnight.
+    """
+    snapshot = cache.get(snapshot_key(user_id))
+    if snapshot and snapshot['date'] == timezone.now().date().isoformat():
+        return snapshot['data'], snapshot['digest']
+    return None
+
+
+def set_snapshot(user_id, data):
+    """
+    Caches the sections and returns their content digest, which is the
+    dashboard's ETag source: a rebuilt but identical snapshot keeps it.
+    """
+    digest = hashlib.md5(json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()).hexdigest()
+    snapshot = {'date': timezone.now().date().isoformat(), 'data': data, 'digest': digest}
+    cache.set(snapshot_key(user_id), snapshot, DASHBOARD_CACHE_TIMEOUT)
+    return digest
+
+
+def invalidate_dashboard(*user_ids):
+    """
+    Drops the users' snapshots once the current transaction commits (right
+    away outside one), like api.cache.invalidate_responses: dropping them
+    earlier would let a concurrent request rebuild and cache the old rows.
+    """
+    keys = [snapshot_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_for_request(blood_request):
+    """
+    A change to a request shows up on the recipient's dashboard and on the
+    dashboard of every donor who accepted it.
+    """
+    donor_ids = list(blood_request.donors.values_list('id', flat=True))
+    invalidate_dashboard(blood_request.recipient_id, *donor_ids)
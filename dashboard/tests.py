@@ -1,3 +1,67 @@
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from blood_request.models import BloodRequest
+from donors.models import DonorProfile
+
+
+class UserDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='me@example.com', password='pass12345')
+        self.other = User.objects.create_user(email='other@example.com', password='pass12345')
+        DonorProfile.objects.create(user=self.user, blood_group='A+', age=30)
+        self.client.force_authenticate(self.user)
+
+        today = timezone.now().date()
+        self.past = today - timedelta(days=5)
+        self.future = today + timedelta(days=5)
+
+    def make_request(self, recipient, donation_date, donors=()):
+        blood_request = BloodRequest.objects.create(
+            recipient=recipient, blood_group='A+', donation_date=donation_date
+        )
+        blood_request.donors.add(*donors)
+        return blood_request
+
+    def test_sections_are_classified(self):
+        ongoing = self.make_request(self.user, self.future)
+        received = self.make_request(self.user, self.past, donors=[self.other])
+        canceled = self.make_request(self.user, self.past)
+        upcoming = self.make_request(self.other, self.future, donors=[self.user])
+        donated = self.make_request(self.other, self.past, donors=[self.user])
+        self.make_request(self.other, self.future)
+
+        data = self.client.get('/api/v1/dashboard/').data
+
+        def ids(rows):
+            return [row['id'] for row in rows]
+
+        self.assertEqual(ids(data['active_dashboard']['ongoing_requests']), [ongoing.id])
+        self.assertEqual(ids(data['active_dashboard']['upcoming_donations']), [upcoming.id])
+        self.assertEqual(ids(data['history']['received']), [received.id])
+        self.assertEqual(ids(data['history']['donated']), [donated.id])
+        self.assertEqual(ids(data['history']['canceled']), [canceled.id])
+        self.assertEqual(data['summary_stats']['total_completed_donations'], 1)
+        self.assertEqual(data['summary_stats']['total_received_requests'], 1)
+
+    def test_snapshot_is_cached_and_invalidated(self):
+        blood_request = self.make_request(self.other, self.future)
+        self.client.get('/api/v1/dashboard/')
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/dashboard/')
 
-# Create your tests here.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/v1/requests/{blood_request.id}/accept/')
+        data = self.client.get('/api/v1/dashboard/').data
+        self.assertEqual(
+            [row['id'] for row in data['active_dashboard']['upcoming_donations']],
+            [blood_request.id],
+        )
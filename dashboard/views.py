@@ -1,10 +1,21 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
 from django.utils import timezone
 from donors.models import DonorProfile
 from blood_request.models import BloodRequest
 from donors.serializers import DonorProfileSerializer
 from blood_request.serializers import BloodRequestSerializer
+from api.conditional import make_etag, not_modified, set_validators
+from .cache import get_snapshot, set_snapshot
+
+# Dashboard sections, in the order a request is checked against them.
+ACTIVE = 'active'
+UPCOMING = 'upcoming'
+RECEIVED = 'received'
+DONATED = 'donated'
+CANCELED = 'canceled'
+
 
 class UserDashboardViewSet(viewsets.ViewSet):
     """
@@ -12,81 +23,94 @@ class UserDashboardViewSet(viewsets.ViewSet):
     """
     permission_classes = [permissions.IsAuthenticated]
 
-    def list(self, request):
-        user = request.user
-        
-        # 1. User Details (UPDATED with new fields)
-        user_info = {
-            "id": user.id,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "address": user.address,
-            "phone_number": user.phone_number,
-            "date_joined": user.date_joined.strftime('%Y-%m-%d') if user.date_joined else None,
-        }
+    def get_dashboard_requests(self, user, today):
+        """
+        Every request the user made or accepted, fetched in one query and
+        tagged with the dashboard section it belongs to.
+        """
+        is_donor = Exists(
+            BloodRequest.donors.through.objects.filter(
+                bloodrequest_id=OuterRef('pk'), user_id=user.id
+            )
+        )
+        return BloodRequest.objects.with_read_data().annotate(
+            is_donor=is_donor
+        ).filter(
+            Q(recipient=user) | Q(is_donor=True)
+        ).annotate(
+            section=Case(
+                # Active dashboard: happening today or in the future
+                When(recipient=user, donation_date__gte=today, then=Value(ACTIVE)),
+                When(is_donor=True, donation_date__gte=today, then=Value(UPCOMING)),
+                # History: the donation date has passed
+                When(is_donor=True, then=Value(DONATED)),
+                When(donors_count__gt=0, then=Value(RECEIVED)),
+                default=Value(CANCELED),
+            )
+        ).order_by('-donation_date', '-id')
 
-        # 2. Donor Profile Details
-        profile = DonorProfile.objects.filter(user=user).first()
+    def build_snapshot(self, user):
+        # Joined in by CachedJWTAuthentication, so usually no query here.
+        try:
+            profile = user.donor_profile
+        except DonorProfile.DoesNotExist:
+            profile = None
         profile_data = DonorProfileSerializer(profile).data if profile else "No donor profile found."
 
-        # 3. Define the precise "Donation Date" boundary 
-        # (Using today's date as the strict point of no return)
+        # Using today's date as the strict point of no return
         today = timezone.now().date()
 
-        # ---------------------------------------------------------
-        # ACTIVE DASHBOARD (Happening today or in the future)
-        # ---------------------------------------------------------
-        # Requests I made for today or the future
-        active_requests = BloodRequest.objects.filter(
-            recipient=user, 
-            donation_date__gte=today
-        )
-        
-        # Requests I accepted for today or the future
-        active_commitments = BloodRequest.objects.filter(
-            donors=user, 
-            donation_date__gte=today
-        )
-
-        # ---------------------------------------------------------
-        # HISTORY (Passed the donation date, strictly in the past)
-        # ---------------------------------------------------------
-        # Donated: Requests I accepted where the donation date has passed
-        donated_history = BloodRequest.objects.filter(
-            donors=user, 
-            donation_date__lt=today
-        )
-
-        # Received: Requests I made where the date passed AND at least one person donated
-        received_history = BloodRequest.objects.filter(
-            recipient=user, 
-            donation_date__lt=today, 
-            donors__isnull=False
-        ).distinct() # .distinct() prevents duplicates if multiple donors joined
+        sections = {ACTIVE: [], UPCOMING: [], RECEIVED: [], DONATED: [], CANCELED: []}
+        for blood_request in self.get_dashboard_requests(user, today):
+            sections[blood_request.section].append(blood_request)
 
-        # Canceled: Requests I made where the date passed, but NOBODY showed up to donate
-        canceled_history = BloodRequest.objects.filter(
-            recipient=user, 
-            donation_date__lt=today, 
-            donors__isnull=True
-        )
+        def serialize(section):
+            return BloodRequestSerializer(sections[section], many=True).data
 
-        return Response({
-            "user_details": user_info,
+        return {
             "donor_profile": profile_data,
             "active_dashboard": {
-                "ongoing_requests": BloodRequestSerializer(active_requests, many=True).data,
-                "upcoming_donations": BloodRequestSerializer(active_commitments, many=True).data,
+                "ongoing_requests": serialize(ACTIVE),
+                "upcoming_donations": serialize(UPCOMING),
             },
             "history": {
-                "received": BloodRequestSerializer(received_history, many=True).data,
-                "donated": BloodRequestSerializer(donated_history, many=True).data,
-                "canceled": BloodRequestSerializer(canceled_history, many=True).data,
+                "received": serialize(RECEIVED),
+                "donated": serialize(DONATED),
+                "canceled": serialize(CANCELED),
             },
             "summary_stats": {
-                "total_completed_donations": donated_history.count(),
-                "total_received_requests": received_history.count(),
-                "is_available": profile.is_available if profile else False
+                "total_completed_donations": len(sections[DONATED]),
+                "total_received_requests": len(sections[RECEIVED]),
+                "is_available": profile.is_eligible() if profile else False
             }
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }
+
+    def list(self, request):
+        user = request.user
+
+        user_info = {
+            "id": user.id,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "address": user.address,
+            "phone_number": user.phone_number,
+            "date_joined": user.date_joined.strftime('%Y-%m-%d') if user.date_joined else None,
+        }
+
+        cached = get_snapshot(user.id)
+        if cached is None:
+            snapshot = self.build_snapshot(user)
+            digest = set_snapshot(user.id, snapshot)
+        else:
+            snapshot, digest = cached
+
+        # user_details is always live, so it is part of the validator.
+        etag = make_etag(digest, sorted(user_info.items()))
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response({
+                "user_details": user_info,
+                **snapshot,
+            }, status=status.HTTP_200_OK)
+        return set_validators(response, etag)
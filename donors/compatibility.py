@@ -0,0 +1,39 @@
+"""
+ABO/Rh red cell compatibility, worked out once at import time.
+"""
+
+BLOOD_GROUPS = ['O+', 'O-', 'A+', 'A-', 'B+', 'B-', 'AB+', 'AB-']
+
+# Donor group -> recipient groups that can safely receive it.
+DONOR_TO_RECIPIENTS = {
+    'O-': frozenset(BLOOD_GROUPS),
+    'O+': frozenset(['O+', 'A+', 'B+', 'AB+']),
+    'A-': frozenset(['A-', 'A+', 'AB-', 'AB+']),
+    'A+': frozenset(['A+', 'AB+']),
+    'B-': frozenset(['B-', 'B+', 'AB-', 'AB+']),
+    'B+': frozenset(['B+', 'AB+']),
+    'AB-': frozenset(['AB-', 'AB+']),
+    'AB+': frozenset(['AB+']),
+}
+
+
+def _rank_donor_groups(recipient_group):
+    # Exact match first, then the groups that can help the fewest patients,
+    # so universal O- blood is asked for last.
+    donors = [group for group, recipients in DONOR_TO_RECIPIENTS.items() if recipient_group in recipients]
+    return tuple(sorted(
+        donors,
+        key=lambda group: (group != recipient_group, len(DONOR_TO_RECIPIENTS[group]), BLOOD_GROUPS.index(group)),
+    ))
+
+
+# Recipient group -> donor groups it can receive from, in ranking order.
+RECIPIENT_FROM_DONORS = {group: _rank_donor_groups(group) for group in BLOOD_GROUPS}
+
+
+def can_donate(donor_group, recipient_group):
+    return recipient_group in DONOR_TO_RECIPIENTS.get(donor_group, ())
+
+
+def compatible_donor_groups(recipient_group):
+    return RECIPIENT_FROM_DONORS.get(recipient_group, ())
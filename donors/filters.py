@@ -0,0 +1,18 @@
+from django_filters import rest_framework as filters
+from .models import DonorProfile
+
+
+class DonorProfileFilter(filters.FilterSet):
+    # Worked out against today's date in the query rather than read from
+    # the stored flag, which goes stale once the waiting period runs out.
+    is_available = filters.BooleanFilter(method='filter_is_available')
+    district = filters.CharFilter(field_name='user__district', lookup_expr='iexact')
+
+    class Meta:
+        model = DonorProfile
+        fields = ['blood_group', 'is_available', 'district']
+
+    def filter_is_available(self, queryset, name, value):
+        if value:
+            return queryset.eligible()
+        return queryset.ineligible()
@@ -0,0 +1,199 @@
+"""
+Bulk donor import for blood-drive registrations. Rows are read and
+validated one at a time from a CSV or NDJSON stream and written in batches
+with bulk_create, so memory stays flat and a large file costs a handful of
+INSERTs per batch instead of several queries per donor.
+
+Imported accounts start inactive, flagged `imported`, with an unusable
+password (no hashing on import). Each gets djoser's activation email,
+queued with the batch; once activated, the donor sets a password through
+the password reset flow (see accounts.serializers.PasswordResetSerializer).
+"""
+import codecs
+import csv
+import io
+import json
+import secrets
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from accounts.email import ActivationEmail
+from accounts.models import User
+from api.cache import DONORS, invalidate_responses
+from api.geo import apply_location
+from donors.models import DonorProfile
+from donors.serializers import DonorImportRowSerializer
+from jobs.email import message_payload
+from jobs.worker import enqueue_many
+
+DEFAULT_BATCH_SIZE = 1000
+# The response lists at most this many failing rows; the counts stay exact.
+MAX_REPORTED_ERRORS = 1000
+
+USER_FIELDS = ['first_name', 'last_name', 'phone_number', 'address', 'district', 'upazila']
+
+
+def unusable_password():
+    # Same value as set_unusable_password(), from one urandom call instead
+    # of forty secrets.choice() calls.
+    return UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(30)
+
+
+def read_rows(stream):
+    """
+    Yields (row_number, data) from a binary stream of CSV with a header row
+    or NDJSON; the format is told apart by the first character. Malformed
+    NDJSON lines are yielded as their error message.
+    """
+    text = codecs.getreader('utf-8-sig')(stream)
+    first_line = text.readline()
+    lines = chain([first_line], text)
+
+    if first_line.lstrip().startswith('{'):
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, "Invalid JSON."
+        return
+
+    for number, row in enumerate(csv.DictReader(lines), start=2):
+        yield number, {key.strip().lower(): value.strip() for key, value in row.items() if key and value is not None}
+
+
+class DonorImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.seen_emails = set()
+        # One instance for every row: building a serializer copies all of
+        # its fields, which would cost more than the validation itself.
+        self.validator = DonorImportRowSerializer()
+
+    def add_error(self, row, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def run(self, stream):
+        batch = []
+        for number, data in read_rows(stream):
+            if not isinstance(data, dict):
+                self.add_error(number, {'non_field_errors': [data if isinstance(data, str) else "Expected an object."]})
+                continue
+
+            try:
+                row = self.validator.run_validation(data)
+            except ValidationError as exc:
+                self.add_error(number, as_serializer_error(exc))
+                continue
+
+            row['email'] = User.objects.normalize_email(row['email'])
+            if row['email'] in self.seen_emails:
+                self.add_error(number, {'email': ["Duplicate email in this file."]})
+                continue
+            self.seen_emails.add(row['email'])
+
+            batch.append((number, row))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+
+        if batch:
+            self.flush(batch)
+        if self.created:
+            invalidate_responses(DONORS)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+    def flush(self, batch):
+        existing = set(
+            User.objects.filter(email__in=[row['email'] for _, row in batch]).values_list('email', flat=True)
+        )
+        fresh = []
+        for number, row in batch:
+            if row['email'] in existing:
+                self.add_error(number, {'email': ["A user with this email already exists."]})
+            else:
+                fresh.append((number, row))
+        if not fresh:
+            return
+
+        try:
+            with transaction.atomic():
+                self.insert(fresh)
+        except IntegrityError:
+            # Someone registered one of these emails meanwhile; fall back to
+            # row by row so only the clashing rows fail.
+            for number, row in fresh:
+                try:
+                    with transaction.atomic():
+                        self.insert([(number, row)])
+                except IntegrityError:
+                    self.add_error(number, {'email': ["A user with this email already exists."]})
+
+    def insert(self, rows):
+        # bulk_create skips save(), so the derived fields are filled in here.
+        users = []
+        for _, row in rows:
+            user = User(email=row['email'], is_active=False, imported=True, password=unusable_password())
+            for field in USER_FIELDS:
+                setattr(user, field, row[field])
+            apply_location(user, user.address)
+            users.append(user)
+        users = User.objects.bulk_create(users)
+
+        if any(user.pk is None for user in users):
+            ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id'))
+            for user in users:
+                user.pk = ids[user.email]
+
+        profiles = []
+        for user, (_, row) in zip(users, rows):
+            profile = DonorProfile(
+                user_id=user.pk,
+                blood_group=row['blood_group'],
+                age=row['age'],
+                last_donation_date=row['last_donation_date'],
+            )
+            profile.next_eligible_date = DonorProfile.compute_next_eligible_date(profile.last_donation_date)
+            profile.is_available = profile.is_eligible()
+            profiles.append(profile)
+        DonorProfile.objects.bulk_create(profiles)
+        send_activation_emails(users)
+        self.created += len(rows)
+
+
+def send_activation_emails(users):
+    """Renders the activation emails and queues them with one INSERT."""
+    payloads = []
+    for user in users:
+        message = ActivationEmail(context={'user': user})
+        message.render()
+        message.to = [user.email]
+        message.from_email = settings.DEFAULT_FROM_EMAIL
+        payloads.append(message_payload(message))
+    enqueue_many('send_email', payloads)
+
+
+def import_donors(stream, batch_size=DEFAULT_BATCH_SIZE):
+    """Imports donors from a binary CSV/NDJSON stream and returns the report."""
+    if isinstance(stream, (bytes, str)):
+        stream = io.BytesIO(stream.encode() if isinstance(stream, str) else stream)
+    return DonorImporter(batch_size).run(stream)
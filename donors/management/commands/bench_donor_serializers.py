@@ -0,0 +1,55 @@
+import statistics
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from donors.models import DonorProfile
+from donors.serializers import DonorProfileRowSerializer, DonorProfileSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a donor list page through DonorProfileSerializer (select_related model "
+        "instances) and through DonorProfileRowSerializer (values_list rows), fetch "
+        "included, at several page sizes. Needs at least the largest page of donors "
+        "(see seed_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        available = DonorProfile.objects.count()
+        if available < max(options['sizes']):
+            raise CommandError(f"Only {available} donor profile(s); run seed_data first.")
+
+        queryset = DonorProfile.objects.select_related('user').order_by('id')
+        rows = DonorProfileRowSerializer()
+
+        def model_page(size):
+            return DonorProfileSerializer(queryset[:size], many=True).data
+
+        def row_page(size):
+            return rows.data(rows.rows(queryset)[:size])
+
+        if model_page(10) != row_page(10):
+            raise CommandError("The serializers disagree; fix DonorProfileRowSerializer first.")
+
+        self.stdout.write(f"{'page size':>10}{'model ms':>11}{'rows ms':>10}{'us/row':>16}{'speedup':>9}")
+        for size in options['sizes']:
+            model = self.time(model_page, size, options['repeat'])
+            row = self.time(row_page, size, options['repeat'])
+            self.stdout.write(
+                f"{size:>10}{model:>11.2f}{row:>10.2f}"
+                f"{model / size * 1000:>8.1f} ->{row / size * 1000:>6.1f}{model / row:>8.1f}x"
+            )
+
+    def time(self, page, size, repeat):
+        page(size)
+        runs = []
+        for _ in range(repeat):
+            start = perf_counter()
+            page(size)
+            runs.append((perf_counter() - start) * 1000)
+        return statistics.median(runs)
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blood_request.gateway import GatewayError, get_gateway
+from donors.models import DonationTransaction
+
+# SSLCommerz transaction statuses and the local status they settle to.
+GATEWAY_STATUSES = {
+    'VALID': DonationTransaction.SUCCESS,
+    'VALIDATED': DonationTransaction.SUCCESS,
+    'FAILED': DonationTransaction.FAILED,
+    'CANCELLED': DonationTransaction.FAILED,
+    'EXPIRED': DonationTransaction.FAILED,
+    'UNATTEMPTED': DonationTransaction.FAILED,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Settle PENDING donation transactions whose callback never arrived by asking the "
+        "gateway for their status. Point SSLCOMMERZ_BASE_URL at run_gateway_stub to try it locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=30, help="Only check transactions older than this many minutes.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def gateway_status(self, gateway, donation_id):
+        answer = gateway.query_transaction(f"don_{donation_id}")
+        outcomes = {
+            GATEWAY_STATUSES[element.get('status')]
+            for element in answer.get('element') or []
+            if element.get('status') in GATEWAY_STATUSES
+        }
+        # A payment may have several attempts; one successful one is enough.
+        if DonationTransaction.SUCCESS in outcomes:
+            return DonationTransaction.SUCCESS
+        return outcomes.pop() if outcomes else None
+
+    def handle(self, *args, **options):
+        gateway = get_gateway()
+        batch_size = options['batch_size']
+        cutoff = timezone.now() - timedelta(minutes=options['older_than'])
+        pending = DonationTransaction.objects.stale(cutoff).order_by('id')
+
+        settled = {DonationTransaction.SUCCESS: 0, DonationTransaction.FAILED: 0}
+        unresolved = errors = 0
+        last_id = 0
+        while True:
+            ids = list(pending.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            outcomes = {DonationTransaction.SUCCESS: [], DonationTransaction.FAILED: []}
+            for donation_id in ids:
+                try:
+                    status = self.gateway_status(gateway, donation_id)
+                except GatewayError as exc:
+                    errors += 1
+                    self.stderr.write(f"don_{donation_id}: {exc}")
+                    continue
+                if status is None:
+                    unresolved += 1
+                else:
+                    outcomes[status].append(donation_id)
+
+            # One guarded UPDATE per outcome and batch; callbacks that landed
+            # meanwhile have already moved their rows out of PENDING.
+            for status, donation_ids in outcomes.items():
+                if donation_ids and not options['dry_run']:
+                    settled[status] += DonationTransaction.objects.filter(
+                        id__in=donation_ids, status=DonationTransaction.PENDING
+                    ).update(status=status)
+                elif donation_ids:
+                    settled[status] += len(donation_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Settled {settled[DonationTransaction.SUCCESS]} as SUCCESS and "
+            f"{settled[DonationTransaction.FAILED]} as FAILED; "
+            f"{unresolved} still pending, {errors} gateway error(s)."
+        ))
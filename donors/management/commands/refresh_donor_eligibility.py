@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.cache import invalidate_cached_user
+from api.cache import DONORS, invalidate_responses
+from donors.models import DonorProfile
+
+REFRESHED_FIELDS = ['next_eligible_date', 'is_available', 'updated_at']
+
+
+class Command(BaseCommand):
+    help = "Recompute next_eligible_date and the legacy is_available flag for every donor profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        now = timezone.now()
+        today = now.date()
+        profiles = DonorProfile.objects.only(
+            'id', 'user_id', 'last_donation_date', 'next_eligible_date', 'is_available'
+        ).order_by('id')
+
+        changed = []
+        updated = 0
+        for profile in profiles.iterator(chunk_size=chunk_size):
+            next_eligible_date = DonorProfile.compute_next_eligible_date(profile.last_donation_date)
+            is_available = next_eligible_date is None or next_eligible_date <= today
+            if (profile.next_eligible_date, profile.is_available) == (next_eligible_date, is_available):
+                continue
+
+            profile.next_eligible_date = next_eligible_date
+            profile.is_available = is_available
+            profile.updated_at = now
+            changed.append(profile)
+            if len(changed) >= chunk_size:
+                DonorProfile.objects.bulk_update(changed, REFRESHED_FIELDS)
+                invalidate_cached_user(*[profile.user_id for profile in changed])
+                updated += len(changed)
+                changed = []
+
+        if changed:
+            DonorProfile.objects.bulk_update(changed, REFRESHED_FIELDS)
+            invalidate_cached_user(*[profile.user_id for profile in changed])
+            updated += len(changed)
+        if updated:
+            invalidate_responses(DONORS)
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {updated} donor profile(s)."))
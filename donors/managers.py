@@ -0,0 +1,32 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class DonorProfileQuerySet(models.QuerySet):
+    def eligible(self, on=None):
+        """
+        Donors who may give blood on the given date (today by default):
+        those who never donated or whose waiting period is over. With a
+        blood_group filter this is a range scan on the composite index.
+        """
+        on = on or timezone.now().date()
+        return self.filter(Q(next_eligible_date__isnull=True) | Q(next_eligible_date__lte=on))
+
+    def ineligible(self, on=None):
+        on = on or timezone.now().date()
+        return self.filter(next_eligible_date__gt=on)
+
+
+class DonationTransactionQuerySet(models.QuerySet):
+    def settle(self, donation_id, status):
+        """
+        Moves a PENDING transaction to its final status in one conditional
+        UPDATE. Returns 0 when it was already settled (a retried callback)
+        or does not exist, so repeats never write twice.
+        """
+        return self.filter(pk=donation_id, status=self.model.PENDING).update(status=status)
+
+    def stale(self, older_than):
+        """PENDING transactions created before `older_than`; served by the status/created_at index."""
+        return self.filter(status=self.model.PENDING, created_at__lt=older_than)
@@ -0,0 +1,67 @@
+from django.db.models import F
+from .compatibility import compatible_donor_groups
+from .models import DonorProfile
+
+
+class RankedCandidates:
+    """
+    Chains several querysets, one per ranking tier, behind the interface a
+    Django paginator expects. Only the COUNT of each tier and the slices a
+    page actually covers are ever queried.
+    """
+    ordered = True
+
+    def __init__(self, querysets):
+        self.querysets = list(querysets)
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            rows = self[index:index + 1]
+            if not rows:
+                raise IndexError(index)
+            return rows[0]
+
+        start, stop, _ = index.indices(self.count())
+        rows = []
+        offset = 0
+        for queryset, size in zip(self.querysets, self.counts()):
+            if offset >= stop:
+                break
+            if start < offset + size:
+                rows.extend(queryset[max(start - offset, 0):min(stop - offset, size)])
+            offset += size
+        return rows
+
+
+def candidate_donors(blood_request):
+    """
+    Eligible donors who can give to the request in two tiers: the exact blood
+    group first, then every other compatible group together. Each tier is
+    ordered by time since the last donation (first-time donors lead), so a
+    long-rested O+ donor comes before a recently eligible O- one.
+    """
+    exact, *others = compatible_donor_groups(blood_request.blood_group)
+    already_donating = blood_request.donors.values('id')
+    candidates = (
+        DonorProfile.objects.eligible()
+        .exclude(user_id=blood_request.recipient_id)
+        .exclude(user_id__in=already_donating)
+        .select_related('user')
+        .order_by(F('next_eligible_date').asc(nulls_first=True), 'id')
+    )
+    return RankedCandidates([
+        candidates.filter(blood_group=exact),
+        candidates.filter(blood_group__in=others),
+    ])
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:36
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_next_eligible_date(apps, schema_editor):
+    DonorProfile = apps.get_model('donors', 'DonorProfile')
+    profiles = DonorProfile.objects.filter(last_donation_date__isnull=False).only('id', 'last_donation_date')
+    batch = []
+    for profile in profiles.iterator(chunk_size=2000):
+        profile.next_eligible_date = profile.last_donation_date + timedelta(days=90)
+        batch.append(profile)
+        if len(batch) >= 2000:
+            DonorProfile.objects.bulk_update(batch, ['next_eligible_date'])
+            batch = []
+    if batch:
+        DonorProfile.objects.bulk_update(batch, ['next_eligible_date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donors', '0002_donationtransaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donorprofile',
+            name='next_eligible_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(populate_next_eligible_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='donorprofile',
+            index=models.Index(fields=['blood_group', 'next_eligible_date'], name='donor_group_eligible_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donors', '0003_donorprofile_next_eligible_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationtransaction',
+            index=models.Index(fields=['status', 'created_at'], name='donation_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donors', '0004_donationtransaction_status_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationtransaction',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='donation_user_created_idx'),
+        ),
+    ]
@@ -3,6 +3,14 @@ from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import uuid
+from accounts.cache import invalidate_cached_user
+from api.cache import DONORS, invalidate_responses
+from dashboard.cache import invalidate_dashboard
+from donors.managers import DonationTransactionQuerySet, DonorProfileQuerySet
+
+# Minimum gap between two whole-blood donations.
+DONATION_INTERVAL = timedelta(days=90)
+
 
 class DonorProfile(models.Model):
     BLOOD_GROUPS = [
@@ -18,29 +26,81 @@ class DonorProfile(models.Model):
     blood_group = models.CharField(max_length=3, choices=BLOOD_GROUPS)
     age = models.PositiveIntegerField()
     last_donation_date = models.DateField(null=True, blank=True)
+    # Derived from last_donation_date; NULL means the donor never gave blood.
+    next_eligible_date = models.DateField(null=True, blank=True, db_index=True)
+    # Legacy flag, only correct as of the last save or refresh_donor_eligibility
+    # run. Filter with DonorProfile.objects.eligible() instead.
     is_available = models.BooleanField(default=True)
+    # Conditional GETs compare against this; bulk_update() callers have to
+    # set it themselves.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DonorProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['blood_group', 'next_eligible_date'], name='donor_group_eligible_idx'),
+        ]
+
+    @staticmethod
+    def compute_next_eligible_date(last_donation_date):
+        if not last_donation_date:
+            return None
+        return last_donation_date + DONATION_INTERVAL
+
+    def is_eligible(self, on=None):
+        on = on or timezone.now().date()
+        return self.next_eligible_date is None or self.next_eligible_date <= on
 
     def save(self, *args, **kwargs):
-        if not self.last_donation_date:
-            self.is_available = True
-        else:
-            next_available_date = self.last_donation_date + timedelta(days=90)
-            today = timezone.now().date()
-            
-            if today >= next_available_date:
-                self.is_available = True
-            else:
-                self.is_available = False
+        self.next_eligible_date = self.compute_next_eligible_date(self.last_donation_date)
+        self.is_available = self.is_eligible()
         super().save(*args, **kwargs)
+        invalidate_dashboard(self.user_id)
+        # The cached auth user carries its donor profile.
+        invalidate_cached_user(self.user_id)
+        invalidate_responses(DONORS)
+
+    def delete(self, *args, **kwargs):
+        invalidate_dashboard(self.user_id)
+        invalidate_cached_user(self.user_id)
+        result = super().delete(*args, **kwargs)
+        invalidate_responses(DONORS)
+        return result
 
 
 
 class DonationTransaction(models.Model):
+    PENDING = 'PENDING'
+    SUCCESS = 'SUCCESS'
+    FAILED = 'FAILED'
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     tran_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
-    status = models.CharField(max_length=20, default='PENDING') # PENDING, SUCCESS, FAILED
+    status = models.CharField(max_length=20, default=PENDING) # PENDING, SUCCESS, FAILED
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DonationTransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Reconciliation scans for old PENDING rows.
+            models.Index(fields=['status', 'created_at'], name='donation_status_created_idx'),
+            # A donor's payment history, newest first.
+            models.Index(fields=['user', 'created_at', 'id'], name='donation_user_created_idx'),
+        ]
+
+    @staticmethod
+    def parse_tran_id(tran_id):
+        """
+        Gateway tran_ids look like "don_<pk>". Returns the pk, or None for
+        anything malformed.
+        """
+        prefix, _, pk = (tran_id or '').partition('_')
+        if prefix != 'don' or not pk.isdigit():
+            return None
+        return int(pk)
+
     def __str__(self):
         return f"{self.user.email} - {self.amount} - {self.status}"
@@ -1,13 +1,104 @@
 from rest_framework import serializers
+from django.utils import timezone
 from .models import DonorProfile
 
 
 class DonorProfileSerializer(serializers.ModelSerializer):
     full_name = serializers.CharField(source='user.get_full_name', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
+    is_available = serializers.SerializerMethodField()
+    district = serializers.CharField(source='user.district', read_only=True)
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = DonorProfile
-        fields = ['id', 'user','full_name','age','email','blood_group', 'last_donation_date', 'is_available']
-        read_only_fields = ['user', 'is_available'] 
-  
\ No newline at end of file
+        fields = ['id', 'user','full_name','age','email','blood_group', 'last_donation_date', 'next_eligible_date', 'is_available', 'district', 'distance_km']
+        read_only_fields = ['user', 'next_eligible_date']
+
+    def get_is_available(self, obj):
+        return obj.is_eligible()
+
+    def get_distance_km(self, obj):
+        # Only set when the list was filtered with ?near=
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+
+class DonorProfileRowSerializer:
+    """
+    Read-only twin of DonorProfileSerializer for list pages. Rows come from
+    values_list() and are turned into the same dicts directly, skipping
+    model instances and DRF's per-field machinery, which dominate the CPU
+    cost of large pages. Keep both in step when fields change.
+    """
+    columns = (
+        'id', 'user_id', 'user__first_name', 'user__last_name', 'age', 'user__email',
+        'blood_group', 'last_donation_date', 'next_eligible_date', 'user__district',
+    )
+
+    def __init__(self, today=None):
+        self.today = today or timezone.now().date()
+
+    def rows(self, queryset):
+        """The queryset as named rows; includes the ?near= distance when annotated."""
+        columns = self.columns + (('distance_km',) if 'distance_km' in queryset.query.annotations else ())
+        return queryset.values_list(*columns, named=True)
+
+    def to_representation(self, row):
+        full_name = f"{row.user__first_name} {row.user__last_name}".strip()
+        last_donation, next_eligible = row.last_donation_date, row.next_eligible_date
+        distance = getattr(row, 'distance_km', None)
+        return {
+            'id': row.id,
+            'user': row.user_id,
+            'full_name': full_name,
+            'age': row.age,
+            'email': row.user__email,
+            'blood_group': row.blood_group,
+            'last_donation_date': last_donation.isoformat() if last_donation else None,
+            'next_eligible_date': next_eligible.isoformat() if next_eligible else None,
+            'is_available': next_eligible is None or next_eligible <= self.today,
+            'district': row.user__district,
+            'distance_km': round(distance, 2) if distance is not None else None,
+        }
+
+    def data(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class DonorCandidateSerializer(DonorProfileSerializer):
+    exact_match = serializers.SerializerMethodField()
+
+    class Meta(DonorProfileSerializer.Meta):
+        fields = DonorProfileSerializer.Meta.fields + ['exact_match']
+
+    def get_exact_match(self, obj):
+        return obj.blood_group == self.context.get('blood_group')
+
+
+class DonorImportRowSerializer(serializers.Serializer):
+    """
+    One row of a blood-drive registration file. Plain serializer on purpose:
+    uniqueness is checked per batch by the importer, not per row.
+    """
+    email = serializers.EmailField(max_length=254)
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    phone_number = serializers.CharField(max_length=15, required=False, allow_blank=True, allow_null=True, default=None)
+    address = serializers.CharField(required=False, allow_blank=True, allow_null=True, default=None)
+    district = serializers.CharField(max_length=50, required=False, allow_blank=True, allow_null=True, default=None)
+    upazila = serializers.CharField(max_length=50, required=False, allow_blank=True, allow_null=True, default=None)
+    blood_group = serializers.ChoiceField(choices=DonorProfile.BLOOD_GROUPS)
+    age = serializers.IntegerField(min_value=1)
+    last_donation_date = serializers.DateField(required=False, allow_null=True, default=None)
+
+    def to_internal_value(self, data):
+        # CSV cells are always strings; treat empty ones as missing.
+        if isinstance(data, dict):
+            data = {key: value for key, value in data.items() if value not in ('', None)}
+        return super().to_internal_value(data)
+
+    def validate_last_donation_date(self, value):
+        if value and value > timezone.now().date():
+            raise serializers.ValidationError("The date cannot be in the future!")
+        return value
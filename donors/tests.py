@@ -1,3 +1,147 @@
+import re
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from donors.compatibility import BLOOD_GROUPS, can_donate, compatible_donor_groups
+from donors.importer import import_donors
+from donors.models import DonorProfile
+from donors.serializers import DonorProfileSerializer
+
+
+class DonorImportTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(email='taken@example.com', password='pass12345')
+
+    def test_csv_rows_are_created_in_batches_and_errors_reported(self):
+        last = timezone.now().date() - timedelta(days=30)
+        csv_data = (
+            "email,first_name,blood_group,age,address,last_donation_date\n"
+            f"a@example.com,Rahim,O+,25,Mirpur Dhaka,{last}\n"
+            "b@example.com,Karim,AB-,31,,\n"
+            "taken@example.com,Dup,A+,40,,\n"
+            "not-an-email,Bad,Z+,0,,\n"
+            "a@example.com,Again,O+,25,,\n"
+        )
+        # Existing-email lookup, then one INSERT per table (users, profiles,
+        # activation email jobs) inside a savepoint.
+        with self.assertNumQueries(6):
+            report = import_donors(csv_data, batch_size=10)
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [5, 6, 4])
+        self.assertEqual(set(report['errors'][0]['errors']), {'email', 'blood_group', 'age'})
+
+        profile = DonorProfile.objects.select_related('user').get(user__email='a@example.com')
+        self.assertEqual(profile.next_eligible_date, last + timedelta(days=90))
+        self.assertFalse(profile.is_available)
+        self.assertEqual(profile.user.district, 'Dhaka')
+        self.assertFalse(profile.user.has_usable_password())
+        self.assertFalse(profile.user.is_active)
+        self.assertTrue(profile.user.imported)
+
+    def test_ndjson_upload_is_staff_only(self):
+        client = APIClient()
+        lines = b'{"email": "c@example.com", "blood_group": "B+", "age": 22}\n[1, 2]\n'
+        upload = SimpleUploadedFile('drive.ndjson', lines)
+
+        client.force_authenticate(User.objects.get(email='taken@example.com'))
+        self.assertEqual(client.post('/api/v1/donors/import/', {'file': upload}).status_code, 403)
+
+        staff = User.objects.create_user(email='staff@example.com', password='pass12345', is_staff=True)
+        client.force_authenticate(staff)
+        upload.seek(0)
+        response = client.post('/api/v1/donors/import/', {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+
+    def test_imported_donor_activates_then_sets_a_password(self):
+        import_donors('email,blood_group,age\nclaim@example.com,O-,28\n')
+        client = APIClient()
+        reset = {'email': 'claim@example.com'}
+        # Not activated yet: the reset is accepted but nothing is sent.
+        self.assertEqual(client.post('/api/v1/auth/users/reset_password/', reset).status_code, 204)
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['claim@example.com'])
+        uid, token = re.search(r'activate/([^/]+)/([^/\s]+)', mail.outbox[0].body).groups()
+        response = client.post('/api/v1/auth/users/activation/', {'uid': uid, 'token': token})
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(client.post('/api/v1/auth/users/reset_password/', reset).status_code, 204)
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('password/reset/confirm/', mail.outbox[1].body)
+
+    def test_only_imported_accounts_reset_without_a_password(self):
+        user = User.objects.get(email='taken@example.com')
+        user.set_unusable_password()
+        user.save()
+        response = APIClient().post('/api/v1/auth/users/reset_password/', {'email': 'taken@example.com'})
+        self.assertEqual(response.status_code, 204)
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(mail.outbox, [])
+
+    def test_command_reads_a_file(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as handle:
+            handle.write(b'email,blood_group,age\nd@example.com,A-,45\n')
+            handle.flush()
+            out = StringIO()
+            call_command('import_donors', handle.name, stdout=out, stderr=StringIO())
+
+        self.assertIn('Imported 1 donor(s)', out.getvalue())
+        self.assertTrue(DonorProfile.objects.filter(user__email='d@example.com').exists())
+
+
+class DonorListSerializationTests(TestCase):
+    def test_row_serializer_matches_the_model_serializer(self):
+        today = timezone.now().date()
+        for index, (group, last) in enumerate([('O+', None), ('A-', today - timedelta(days=10)), ('B+', today - timedelta(days=200))]):
+            user = User.objects.create_user(
+                email=f'row{index}@example.com', password='pass12345',
+                first_name='Row' if index else '', last_name=str(index), address='Mirpur Dhaka' if index else None,
+            )
+            DonorProfile.objects.create(user=user, blood_group=group, age=20 + index, last_donation_date=last)
+
+        for query in ({}, {'near': '23.8103,90.4125', 'radius_km': '50'}):
+            with self.subTest(query=query):
+                results = APIClient().get('/api/v1/donors/', query).data['results']
+                profiles = DonorProfile.objects.select_related('user').in_bulk([row['id'] for row in results])
+                expected = []
+                for row in results:
+                    profile = profiles[row['id']]
+                    profile.distance_km = row['distance_km']
+                    expected.append(dict(DonorProfileSerializer(profile).data))
+                self.assertEqual(results, expected)
+                self.assertEqual(len(results), 3 if not query else 2)
+
+
+class CompatibilityTests(TestCase):
+    def antigens(self, group):
+        return set(group.rstrip('+-').replace('O', '')) | ({'Rh'} if group.endswith('+') else set())
+
+    def test_matrix_follows_abo_rh_rules(self):
+        # Red cells can go to anyone who already carries all of their antigens.
+        for donor in BLOOD_GROUPS:
+            for recipient in BLOOD_GROUPS:
+                with self.subTest(donor=donor, recipient=recipient):
+                    expected = self.antigens(donor) <= self.antigens(recipient)
+                    self.assertEqual(can_donate(donor, recipient), expected)
+                    self.assertEqual(donor in compatible_donor_groups(recipient), expected)
+
+    def test_exact_group_first_and_universal_donors_last(self):
+        self.assertEqual(compatible_donor_groups('O-'), ('O-',))
+        self.assertEqual(compatible_donor_groups('A+'), ('A+', 'O+', 'A-', 'O-'))
+        self.assertEqual(compatible_donor_groups('AB+'), ('AB+', 'A+', 'B+', 'AB-', 'O+', 'A-', 'B-', 'O-'))
+        self.assertEqual(compatible_donor_groups('Z+'), ())
 
-# Create your tests here.
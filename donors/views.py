@@ -1,23 +1,52 @@
 from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.parsers import FileUploadParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.exceptions import ValidationError
 from django.db import IntegrityError
 from django.utils import timezone
 import datetime
+from .compatibility import BLOOD_GROUPS
 from .models import DonorProfile
-from .serializers import DonorProfileSerializer
+from .serializers import DonorProfileRowSerializer, DonorProfileSerializer
 from .permissions import Editpermission
-from api.pagination import DefaultPagination
+from .filters import DonorProfileFilter
+from .importer import import_donors
+from api.pagination import DonorPagination
+from api.search import TrigramSearchFilter
+from api.geo import NearFilter
+from api.cache import DONORS, CachedListMixin
+from api.conditional import ConditionalGetMixin
 
-class DonorViewSet(viewsets.ModelViewSet):
-    
-    queryset = DonorProfile.objects.all()
+class DonorRowListMixin:
+    """
+    Lists donors through DonorProfileRowSerializer: values_list() rows in,
+    plain dicts out. Writes and retrieve keep the model serializer.
+    """
+    def list(self, request, *args, **kwargs):
+        serializer = DonorProfileRowSerializer()
+        rows = serializer.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.data(page))
+        return Response(serializer.data(rows))
+
+
+class DonorViewSet(CachedListMixin, ConditionalGetMixin, DonorRowListMixin, viewsets.ModelViewSet):
+    cache_namespace = DONORS
+    queryset = DonorProfile.objects.select_related('user')
     serializer_class = DonorProfileSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ['blood_group','is_available'] 
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, NearFilter, filters.OrderingFilter]
+    filterset_class = DonorProfileFilter
     search_fields = ['user__address', 'blood_group'] 
+    trigram_search_fields = ['user__address']
+    exact_search_fields = {'blood_group': BLOOD_GROUPS}
+    ordering_fields = ['age', 'last_donation_date', 'next_eligible_date']
+    location_field_prefix = 'user__'
     permission_classes = [Editpermission]
-    pagination_class = DefaultPagination
+    pagination_class = DonorPagination
 
     def validate_future_date(self, date_val):
     # Check if value exists and is not an empty string
@@ -47,4 +76,21 @@ class DonorViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         self.validate_future_date(self.request.data.get('last_donation_date'))
-        serializer.save()
\ No newline at end of file
+        serializer.save()
+
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[IsAdminUser], parser_classes=[MultiPartParser, FileUploadParser])
+    def bulk_import(self, request):
+        """
+        Staff only. Upload a CSV (with a header row) or NDJSON file as `file`.
+        Columns: email, blood_group, age, and optionally first_name,
+        last_name, phone_number, address, district, upazila,
+        last_donation_date. Valid rows are created, the others reported by
+        row number. New donors are emailed an activation link and then set
+        a password through the password reset flow.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+        report = import_donors(upload)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
@@ -0,0 +1,70 @@
+"""
+Email through the job queue. QueuedEmailBackend stores each message as a
+`send_email` job instead of talking to the mail server; the worker sends
+a whole batch of them over one connection of JOBS_EMAIL_BACKEND (the
+regular EMAIL_BACKEND by default).
+"""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+JOBS_EMAIL_BACKEND = getattr(settings, 'JOBS_EMAIL_BACKEND', settings.EMAIL_BACKEND)
+
+
+def message_payload(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'content_subtype': message.content_subtype,
+        'alternatives': [[content, mimetype] for content, mimetype in getattr(message, 'alternatives', [])],
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+    }
+
+
+def build_message(payload, connection):
+    message = EmailMultiAlternatives(
+        subject=payload['subject'],
+        body=payload['body'],
+        from_email=payload['from_email'],
+        to=payload['to'],
+        cc=payload['cc'],
+        bcc=payload['bcc'],
+        reply_to=payload['reply_to'],
+        headers=payload['headers'],
+        connection=connection,
+    )
+    message.content_subtype = payload['content_subtype']
+    for content, mimetype in payload['alternatives']:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        from jobs.worker import enqueue
+
+        for message in email_messages:
+            enqueue('send_email', message_payload(message))
+        return len(email_messages)
+
+
+def send_emails(jobs):
+    """Task handler: sends every job's message over a single connection."""
+    from jobs.worker import Heartbeat
+
+    errors = {}
+    heartbeat = Heartbeat(jobs)
+    connection = get_connection(JOBS_EMAIL_BACKEND)
+    with connection:
+        for job in jobs:
+            try:
+                connection.send_messages([build_message(job.payload, connection)])
+            except Exception as exc:
+                errors[job.pk] = f"{type(exc).__name__}: {exc}"
+            heartbeat()
+    return errors
@@ -0,0 +1,56 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.worker import JOBS_BATCH_SIZE, housekeeping, run_batch, worker_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (emails, notifications). Keeps polling until "
+        "stopped; --once drains what is due and exits, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=JOBS_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        handlers = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            self.work(options)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def work(self, options):
+        worker = worker_name()
+        succeeded = failed = 0
+
+        requeued, purged = housekeeping()
+        if requeued or purged:
+            self.stdout.write(f"Requeued {requeued} stuck job(s), purged {purged} finished job(s).")
+
+        while not self.stopping:
+            # Long-running workers would otherwise hold one connection forever.
+            close_old_connections()
+            done, errors = run_batch(worker, options['batch_size'])
+            succeeded += done
+            failed += errors
+            if done or errors:
+                self.stdout.write(f"{worker}: {done} done, {errors} failed")
+                continue
+            if options['once']:
+                break
+            housekeeping()
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {succeeded + failed} job(s): {succeeded} done, {failed} failed."))
+
+    def stop(self, signum, frame):
+        # Finish the current batch, then exit.
+        self.stopping = True
@@ -0,0 +1,50 @@
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class JobQuerySet(models.QuerySet):
+    def due(self, now=None):
+        """QUEUED jobs whose run_at has passed; a range scan on the status/run_at index."""
+        return self.filter(status=self.model.QUEUED, run_at__lte=now or timezone.now())
+
+    def claim(self, worker, limit, tasks=None, exclude_tasks=()):
+        """
+        Marks up to `limit` due jobs as RUNNING for `worker` and returns them,
+        oldest first, optionally only of (or none of) some tasks. On
+        PostgreSQL the rows are picked with FOR UPDATE SKIP LOCKED, so
+        concurrent workers each get different jobs without waiting on each
+        other. SQLite has no row locks; the conditional UPDATE and re-read
+        below keep two local workers from sharing a job.
+        """
+        now = timezone.now()
+        due = self.due(now)
+        if tasks is not None:
+            due = due.filter(task__in=tasks)
+        if exclude_tasks:
+            due = due.exclude(task__in=exclude_tasks)
+        with transaction.atomic():
+            ids = list(
+                due.order_by('run_at', 'id').select_for_update(skip_locked=True).values_list('id', flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            claimed = self.filter(pk__in=ids, status=self.model.QUEUED).update(
+                status=self.model.RUNNING, locked_at=now, locked_by=worker, attempts=F('attempts') + 1,
+            )
+            if not claimed:
+                return []
+        return list(self.filter(pk__in=ids, status=self.model.RUNNING, locked_by=worker, locked_at=now).order_by('run_at', 'id'))
+
+    def requeue_stuck(self, older_than):
+        """
+        Puts RUNNING jobs locked before `older_than` back in the queue: their
+        worker died mid-batch. The attempt still counts.
+        """
+        return self.filter(status=self.model.RUNNING, locked_at__lt=older_than).update(
+            status=self.model.QUEUED, locked_at=None, locked_by='',
+        )
+
+    def purge(self, older_than):
+        """Deletes DONE jobs finished before `older_than`; FAILED ones stay for inspection."""
+        return self.filter(status=self.model.DONE, finished_at__lt=older_than).delete()[0]
@@ -0,0 +1,38 @@
+from django.db import models
+from django.utils import timezone
+from jobs.managers import JobQuerySet
+
+
+class Job(models.Model):
+    """
+    A unit of background work: `task` names a handler in jobs.worker.TASKS
+    and `payload` is its JSON input. Workers claim QUEUED jobs whose run_at
+    has passed; failures go back to QUEUED with a later run_at until
+    max_attempts is used up.
+    """
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, default=QUEUED) # QUEUED, RUNNING, DONE, FAILED
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,103 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from jobs.worker import enqueue, run_batch
+
+
+def email_payload(to):
+    return {
+        'subject': 'Hello', 'body': 'Body', 'content_subtype': 'plain', 'alternatives': [],
+        'from_email': 'noreply@example.com', 'to': [to], 'cc': [], 'bcc': [], 'reply_to': [], 'headers': {},
+    }
+
+
+class JobQueueTests(TestCase):
+    def test_djoser_emails_are_queued_and_sent_over_one_connection(self):
+        client = APIClient()
+        for index in range(3):
+            response = client.post('/api/v1/auth/users/', {'email': f'new{index}@example.com', 'password': 'Str0ng-pass-123'})
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Job.objects.filter(task='send_email', status=Job.QUEUED).count(), 3)
+
+        with mock.patch.object(EmailBackend, 'open', autospec=True, return_value=True) as open_connection:
+            call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [f'new{index}@example.com' for index in range(3)])
+        self.assertIn('/activate/', mail.outbox[0].body)
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 3)
+
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        job = enqueue('send_email', email_payload('a@example.com'), max_attempts=2)
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=SMTPException('421 try later')):
+            self.assertEqual(run_batch('test'), (0, 1))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+            self.assertIn('421 try later', job.last_error)
+            self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=20))
+            self.assertEqual(run_batch('test'), (0, 0))
+
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            self.assertEqual(run_batch('test'), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(mail.outbox, [])
+
+    def test_claimed_jobs_are_not_handed_out_twice(self):
+        first, second = (enqueue('send_email', email_payload(f'{name}@example.com')) for name in ('a', 'b'))
+        self.assertEqual([job.pk for job in Job.objects.claim('one', 1)], [first.pk])
+        self.assertEqual([job.pk for job in Job.objects.claim('two', 5)], [second.pk])
+        self.assertEqual(Job.objects.claim('three', 5), [])
+
+        Job.objects.filter(pk=first.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(Job.objects.requeue_stuck(timezone.now() - timedelta(minutes=15)), 1)
+        self.assertEqual([job.pk for job in Job.objects.claim('three', 5)], [first.pk])
+
+    @mock.patch('jobs.worker.JOBS_HEARTBEAT', timedelta(0))
+    def test_long_batches_keep_their_lock_fresh(self):
+        for name in ('a', 'b'):
+            enqueue('send_email', email_payload(f'{name}@example.com'))
+        requeued = []
+
+        def slow_send(messages):
+            if not requeued:
+                # The first message took an hour...
+                Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+                requeued.append(None)
+            else:
+                # ...then another worker's housekeeping runs mid-batch.
+                requeued.append(Job.objects.requeue_stuck(timezone.now() - timedelta(minutes=15)))
+            return len(messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=slow_send):
+            self.assertEqual(run_batch('test'), (2, 0))
+        self.assertEqual(requeued, [None, 0])
+
+    @mock.patch('jobs.views.JOBS_CRON_TOKEN', 'cron-token')
+    def test_cron_hook_runs_a_batch(self):
+        enqueue('send_email', email_payload('a@example.com'))
+        client = APIClient()
+        self.assertEqual(client.post('/api/v1/jobs/run/').status_code, 403)
+        self.assertEqual(client.get('/api/v1/jobs/run/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        # Vercel Cron calls it with GET.
+        response = client.get('/api/v1/jobs/run/', HTTP_AUTHORIZATION='Bearer cron-token')
+        self.assertEqual(response.json()['done'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_vercel_cron_drains_the_queue(self):
+        with open(settings.BASE_DIR / 'vercel.json') as f:
+            crons = json.load(f)['crons']
+        self.assertIn('/api/v1/jobs/run/', [cron['path'] for cron in crons])
+        self.assertTrue(settings.JOBS_CRON_TOKEN)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.http import HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from jobs.worker import housekeeping, run_batch
+
+JOBS_CRON_TOKEN = getattr(settings, 'JOBS_CRON_TOKEN', '')
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def run_jobs(request):
+    """
+    Runs one batch of due jobs, for hosts without a long-running worker.
+    The `crons` entry in vercel.json GETs it every minute; Vercel sends
+    `Authorization: Bearer <CRON_SECRET>`, which settings reads as
+    JOBS_CRON_TOKEN.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if not JOBS_CRON_TOKEN or scheme.lower() != 'bearer' or not constant_time_compare(token, JOBS_CRON_TOKEN):
+        return HttpResponseForbidden()
+    requeued, purged = housekeeping()
+    done, failed = run_batch()
+    return JsonResponse({'done': done, 'failed': failed, 'requeued': requeued, 'purged': purged})
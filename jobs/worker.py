@@ -0,0 +1,145 @@
+"""
+The job worker. Jobs are claimed in batches and grouped by task; each
+task handler gets its whole group at once (the email handler sends them
+over one SMTP connection) and returns {job id: error} for the jobs that
+failed. Failed jobs are retried with exponential backoff.
+
+Handlers are dotted paths imported on first use, so enqueueing a job never
+imports the code that runs it.
+"""
+import logging
+import os
+import random
+import socket
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_BATCH_SIZE = getattr(settings, 'JOBS_BATCH_SIZE', 50)
+JOBS_RETRY_BASE_SECONDS = getattr(settings, 'JOBS_RETRY_BASE_SECONDS', 30)
+JOBS_RETRY_MAX_SECONDS = getattr(settings, 'JOBS_RETRY_MAX_SECONDS', 60 * 60)
+# Handlers refresh locked_at this often while they work through a batch...
+JOBS_HEARTBEAT = getattr(settings, 'JOBS_HEARTBEAT', timedelta(minutes=1))
+# ...so a RUNNING job not refreshed for this long lost its worker and is
+# queued again. A live worker only goes quiet for one message, which
+# EMAIL_TIMEOUT bounds well below this.
+JOBS_STUCK_AFTER = getattr(settings, 'JOBS_STUCK_AFTER', timedelta(minutes=15))
+JOBS_RETENTION = getattr(settings, 'JOBS_RETENTION', timedelta(days=7))
+
+TASKS = {
+    'send_email': 'jobs.email.send_emails',
+    'notify_donors': 'blood_request.notifications.notify_donors',
+    'deliver_notifications': 'blood_request.notifications.deliver_notifications',
+}
+
+# Most jobs of a task one batch may claim, for tasks whose jobs are large.
+# A delivery job is a whole chunk of notification emails; a worker that
+# fell behind (or one cron call) still sends just one chunk per batch.
+TASK_BATCH_LIMITS = {
+    'deliver_notifications': 1,
+}
+
+
+@lru_cache(maxsize=None)
+def get_handler(task):
+    return import_string(TASKS[task])
+
+
+def enqueue(task, payload, run_at=None, max_attempts=None):
+    if task not in TASKS:
+        raise ValueError(f"Unknown task {task!r}.")
+    job = Job(task=task, payload=payload, run_at=run_at or timezone.now())
+    if max_attempts is not None:
+        job.max_attempts = max_attempts
+    job.save()
+    return job
+
+
+def enqueue_many(task, payloads):
+    """Queues one job per payload with a single INSERT."""
+    if task not in TASKS:
+        raise ValueError(f"Unknown task {task!r}.")
+    now = timezone.now()
+    return Job.objects.bulk_create([Job(task=task, payload=payload, run_at=now) for payload in payloads])
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts`: base * 2^(attempts - 1), capped, with +-20% jitter."""
+    delay = min(JOBS_RETRY_MAX_SECONDS, JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+class Heartbeat:
+    """
+    Call after each unit of work in a handler: every JOBS_HEARTBEAT it moves
+    the batch's locked_at forward, so housekeeping() never requeues jobs
+    that are still being worked on, however long the batch runs.
+    """
+    def __init__(self, jobs):
+        self.ids = [job.pk for job in jobs]
+        self.last = timezone.now()
+
+    def __call__(self):
+        now = timezone.now()
+        if now - self.last >= JOBS_HEARTBEAT:
+            Job.objects.filter(pk__in=self.ids, status=Job.RUNNING).update(locked_at=now)
+            self.last = now
+
+
+def run_batch(worker=None, limit=JOBS_BATCH_SIZE):
+    """Claims and runs one batch. Returns (succeeded, failed) job counts; (0, 0) when idle."""
+    worker = worker or worker_name()
+    jobs = Job.objects.claim(worker, limit, exclude_tasks=list(TASK_BATCH_LIMITS))
+    for task, task_limit in TASK_BATCH_LIMITS.items():
+        jobs += Job.objects.claim(worker, min(limit, task_limit), tasks=[task])
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[job.task].append(job)
+
+    errors = {}
+    for task, group in groups.items():
+        try:
+            errors.update(get_handler(task)(group) or {})
+        except Exception as exc:
+            logger.exception("Task %s failed for %d job(s)", task, len(group))
+            errors.update({job.pk: f"{type(exc).__name__}: {exc}" for job in group})
+
+    finish(jobs, errors)
+    return len(jobs) - len(errors), len(errors)
+
+
+def finish(jobs, errors):
+    now = timezone.now()
+    done = [job.pk for job in jobs if job.pk not in errors]
+    if done:
+        Job.objects.filter(pk__in=done).update(status=Job.DONE, finished_at=now, locked_at=None, locked_by='', last_error='')
+
+    failed = [job for job in jobs if job.pk in errors]
+    for job in failed:
+        job.last_error = errors[job.pk]
+        job.locked_at, job.locked_by = None, ''
+        if job.attempts >= job.max_attempts:
+            job.status, job.finished_at = Job.FAILED, now
+            logger.error("Job %s (%s) failed for good after %d attempt(s): %s", job.pk, job.task, job.attempts, job.last_error)
+        else:
+            job.status, job.run_at = Job.QUEUED, now + backoff(job.attempts)
+    if failed:
+        Job.objects.bulk_update(failed, ['status', 'run_at', 'finished_at', 'last_error', 'locked_at', 'locked_by'])
+
+
+def housekeeping():
+    """Requeues jobs of dead workers and purges old finished jobs; returns both counts."""
+    now = timezone.now()
+    return Job.objects.requeue_stuck(now - JOBS_STUCK_AFTER), Job.objects.purge(now - JOBS_RETENTION)